@@ -0,0 +1,39 @@
+import argparse
+
+import numpy as np
+from llama_index.core.utils import get_tokenizer
+from loguru import logger as log
+
+from src.chat.encoding import encode_candidates
+from src.feature_store.local import LocalFeatureStore
+from src.helper.vars import FS_LOCATION_PATH, QDRANT_PAYLOAD_COLUMNS, TOP_K
+from src.ranker.scoring import compute_normalized_criterion_score
+
+parser = argparse.ArgumentParser(description="Compare the token count of the candidate encodings sent back to the agent LLM.")
+parser.add_argument("--rows", type=int, default=TOP_K, help="Ranked candidates in the tool output.")
+parser.add_argument("--turns", type=int, default=5, help="Later LLM calls that re-send the tool output from memory.")
+args = parser.parse_args()
+
+
+def build_sample_ranking(rows: int) -> list:
+    """Candidates shaped like the ranking tool output, scored from the local feature store (no Qdrant needed)."""
+    locations = LocalFeatureStore(FS_LOCATION_PATH).read_all(columns=QDRANT_PAYLOAD_COLUMNS).head(rows)
+    locations["query_matching_score"] = np.random.default_rng(0).uniform(0.74, 0.9, len(locations))
+    scored = compute_normalized_criterion_score(locations, ["food", "ambience", "price", "service"])
+    return scored[["location_id", "location_name"] + [column for column in scored.columns if column.endswith("_score")]].to_dict("records")
+
+
+if __name__ == "__main__":
+    # -- Same tokenizer as the token limit of the agent memory --
+    tokenizer = get_tokenizer()
+    records = build_sample_ranking(args.rows)
+    baseline = None
+
+    for encoding in ["github", "csv", "compact"]:
+        output = encode_candidates(records, encoding=encoding)
+        tokens = len(tokenizer(output))
+        baseline = baseline or tokens
+        log.info(
+            f"{encoding:>8}: {tokens:>5} tokens ({tokens / baseline:.0%} of github), "
+            f"{tokens * args.turns} tokens re-sent over {args.turns} later calls, {len(output)} chars"
+        )
@@ -0,0 +1,34 @@
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+from loguru import logger as log
+
+from src.helper.vars import STARTER_MESSAGES
+from src.qdrant.embedding import EmbeddingService
+
+parser = argparse.ArgumentParser(description="Compare the query embedding throughput with and without micro-batching under concurrent load.")
+parser.add_argument("--requests", type=int, default=512, help="Single-query embed requests to send.")
+parser.add_argument("--concurrency", type=int, default=32, help="Sessions embedding at the same time.")
+args = parser.parse_args()
+
+
+def run_load(embed: Callable[[List[str]], list], queries: List[str], concurrency: int) -> float:
+    """Embed every query as its own request from `concurrency` threads, returns the throughput in requests per second."""
+    started_at = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(lambda query: list(embed([query])), queries))
+    return len(queries) / (time.perf_counter() - started_at)
+
+
+if __name__ == "__main__":
+    service = EmbeddingService()
+    queries = [f"{STARTER_MESSAGES[i % len(STARTER_MESSAGES)]} #{i}" for i in range(args.requests)]
+    service.embed(queries[:1])
+
+    # -- Same model copy, one model call per request vs micro-batches --
+    direct = run_load(service.model.embed, queries, args.concurrency)
+    batched = run_load(service.embed, queries, args.concurrency)
+    log.info(f"  direct: {direct:.1f} requests/s")
+    log.info(f" batched: {batched:.1f} requests/s ({batched / direct:.1f}x) with {args.concurrency} concurrent sessions")
@@ -0,0 +1,90 @@
+import argparse
+import os
+import time
+from statistics import mean, median
+from typing import Callable, List
+
+import boto3
+from botocore.awsrequest import AWSResponse
+from llama_index.core.callbacks import CallbackManager
+from llama_index.core.memory import ChatMemoryBuffer
+from llama_index.core.storage.chat_store import SimpleChatStore
+from loguru import logger as log
+
+from src.chat.agent import ParseParamsAgent
+from src.chat.chainlit import ChainlitStatusCallback
+from src.chat.client import agent_llm_model
+from src.chat.router import intent_router
+from src.chat.semantic_cache import semantic_response_cache
+from src.chat.tools import candidate_generation_and_ranking_tool, enrich_restaurant_recommendations_tool
+from src.core import generate_foodbot_agent
+from src.s3.client import S3Client, get_s3_client
+
+parser = argparse.ArgumentParser(description="Measure the latency of the per-session setup done on every chat start and resume.")
+parser.add_argument("--sessions", type=int, default=50, help="Chat starts to simulate.")
+parser.add_argument("--s3-latency", type=float, default=0.05, help="Seconds of each simulated S3 round trip (e.g. create_bucket).")
+parser.add_argument("--real-s3", action="store_true", help="Use the configured S3 endpoint (credentials and BUCKET_NAME) instead of simulating it.")
+args = parser.parse_args()
+
+
+class SimulatedRawResponse:
+    """Empty body of a simulated S3 response."""
+
+    def stream(self, **kwargs):
+        return iter([b""])
+
+
+def simulate_s3_round_trip(request, **kwargs) -> AWSResponse:
+    """Answer every S3 request with an empty 200 after `--s3-latency` seconds, instead of sending it."""
+    time.sleep(args.s3_latency)
+    return AWSResponse(request.url, 200, {}, SimulatedRawResponse())
+
+
+def setup_simulated_s3() -> None:
+    """Registered on the default boto3 session, so every S3 client built afterwards gets the simulated round trips."""
+    for var, value in [("DEV_AWS_ENDPOINT", "http://localhost:9000"), ("APP_AWS_ACCESS_KEY", "benchmark"), ("APP_AWS_SECRET_KEY", "benchmark")]:
+        os.environ.setdefault(var, value)
+    os.environ.setdefault("BUCKET_NAME", "benchmark")
+    boto3.setup_default_session(region_name="us-east-1")
+    boto3.DEFAULT_SESSION.events.register("before-send.s3", simulate_s3_round_trip)
+
+
+def start_session_per_session_clients() -> None:
+    """Session start before the shared clients: a new S3 client and a full agent build every time."""
+    S3Client(bucket_name=os.getenv("BUCKET_NAME"))
+    ParseParamsAgent.from_tools(
+        tools=[candidate_generation_and_ranking_tool, enrich_restaurant_recommendations_tool],
+        llm=agent_llm_model.get(),
+        memory=ChatMemoryBuffer.from_defaults(token_limit=4096, chat_store=SimpleChatStore()),
+        callback_manager=CallbackManager([ChainlitStatusCallback()]),
+        verbose=True,
+        response_cache=semantic_response_cache,
+        router=intent_router,
+    )
+
+
+def start_session_shared_clients() -> None:
+    """Session start with the process-wide clients: only the chat memory is new."""
+    get_s3_client(os.getenv("BUCKET_NAME"))
+    generate_foodbot_agent(callback="chainlit", verbose=True)
+
+
+def measure(start_session: Callable[[], None], sessions: int) -> List[float]:
+    """Latency in milliseconds of each simulated session start."""
+    latencies = []
+    for _ in range(sessions):
+        started_at = time.perf_counter()
+        start_session()
+        latencies.append((time.perf_counter() - started_at) * 1000)
+    return latencies
+
+
+if __name__ == "__main__":
+    if not args.real_s3:
+        setup_simulated_s3()
+    for name, start_session in [("per-session", start_session_per_session_clients), ("shared", start_session_shared_clients)]:
+        latencies = measure(start_session, args.sessions)
+        log.info(
+            f"{name:>11}: first {latencies[0]:.2f} ms, then mean {mean(latencies[1:] or latencies):.2f} ms, "
+            f"median {median(latencies[1:] or latencies):.2f} ms over {args.sessions} sessions"
+        )
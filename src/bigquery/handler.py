@@ -1,3 +1,9 @@
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
 import pandas as pd
 import sqlparse
 from google.api_core.exceptions import GoogleAPIError
@@ -5,6 +11,19 @@ from google.cloud import bigquery
 from google.oauth2.service_account import Credentials
 from loguru import logger as log
 
+_IDENTIFIER_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_TABLE_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]+(\.[A-Za-z0-9_-]+){1,2}$")
+
+
+@dataclass
+class _IdBatch:
+    """Pending id lookup shared by every caller that joins it before the leader fires the query."""
+
+    ids: Set[int] = field(default_factory=set)
+    done: threading.Event = field(default_factory=threading.Event)
+    rows: List[dict] = field(default_factory=list)
+    error: Optional[BaseException] = None
+
 
 class BigQueryHandler:
     """BigQueryHandler for interacting with BigQuery, including table management, data upload, and fetching queries."""
@@ -17,6 +36,10 @@ class BigQueryHandler:
             project_id (str): GCP project ID.
             credentials_path (str): Path to the service account JSON file.
         """
+        self._pending_batches: Dict[Tuple[str, Tuple[str, ...], str], _IdBatch] = {}
+        self._running_queries: Dict[Tuple[str, Tuple[str, ...], str], int] = {}
+        self._batch_lock = threading.Lock()
+
         try:
             if not project_id:
                 raise ValueError("Project ID is required to initialize BigQueryHandler.")
@@ -113,6 +136,122 @@ class BigQueryHandler:
             log.exception("An unexpected error occurred during data fetch.")
             raise
 
+    def fetch_by_ids(
+        self,
+        table_id: str,
+        ids: Iterable[int],
+        columns: Optional[List[str]] = None,
+        id_column: str = "location_id",
+        batch_window: float = 0.0,
+    ) -> List[dict]:
+        """
+        Fetch the rows of a table whose integer id is in `ids`, using a parameterized `UNNEST(@ids)` query.
+        The query text only depends on the table and the projected columns, so it is identical for every id set.
+        Lookups for the same table and projection issued within `batch_window` seconds of each other
+        (e.g. from concurrent chat sessions) are merged into a single query. The window is only waited when
+        such a lookup is already running, a lone lookup (the common single-user case) queries right away.
+
+        Args:
+            table_id (str): Fully qualified table id, e.g. `project.dataset.table`.
+            ids (Iterable[int]): Ids to look up. Values are cast to int.
+            columns (Optional[List[str]]): Columns to project. Defaults to all columns.
+            id_column (str): Name of the id column. Default: 'location_id'.
+            batch_window (float): Seconds to wait for other lookups to join before querying, under concurrent load. Default: 0.0.
+
+        Returns:
+            list: List of dictionaries, one per matching row.
+        """
+        wanted = {int(_id) for _id in ids}
+        if not wanted:
+            return []
+
+        columns = tuple(columns) if columns else ()
+        if columns and id_column not in columns:
+            columns = (*columns, id_column)
+        key = (table_id, columns, id_column)
+
+        with self._batch_lock:
+            batch = self._pending_batches.get(key)
+            is_leader = batch is None
+            if is_leader:
+                batch = _IdBatch()
+                self._pending_batches[key] = batch
+                is_concurrent = self._running_queries.get(key, 0) > 0
+            batch.ids.update(wanted)
+
+        if is_leader:
+            if batch_window > 0 and is_concurrent:
+                time.sleep(batch_window)
+            with self._batch_lock:
+                self._pending_batches.pop(key, None)
+                self._running_queries[key] = self._running_queries.get(key, 0) + 1
+            try:
+                batch.rows = self._query_by_ids(table_id, sorted(batch.ids), list(columns), id_column)
+            except BaseException as e:
+                batch.error = e
+            finally:
+                with self._batch_lock:
+                    self._running_queries[key] -= 1
+                    if not self._running_queries[key]:
+                        del self._running_queries[key]
+                batch.done.set()
+        else:
+            log.debug("Joined pending BigQuery lookup on '{}' with {} ids", table_id, len(wanted))
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+
+        return [row for row in batch.rows if row.get(id_column) in wanted]
+
+    def get_table_columns(self, table_id: str) -> List[str]:
+        """
+        Return the column names of a table, read from its schema (no query is run).
+
+        Args:
+            table_id (str): Fully qualified table id, e.g. `project.dataset.table`.
+        """
+        try:
+            return [schema_field.name for schema_field in self.client.get_table(table_id).schema]
+        except GoogleAPIError as api_error:
+            log.error("Google API Error while reading the schema of '{}': {}", table_id, api_error)
+            raise
+
+    def _query_by_ids(self, table_id: str, ids: List[int], columns: List[str], id_column: str) -> List[dict]:
+        """
+        Run the parameterized id lookup behind `fetch_by_ids`.
+        Identifiers cannot be passed as query parameters, so they are validated instead.
+        """
+        if not _TABLE_ID_PATTERN.match(table_id):
+            raise ValueError(f"Invalid table id: {table_id}")
+        for identifier in [id_column, *columns]:
+            if not _IDENTIFIER_PATTERN.match(identifier):
+                raise ValueError(f"Invalid column name: {identifier}")
+
+        projection = ", ".join(columns) if columns else "*"
+        query = f"SELECT {projection} FROM `{table_id}` WHERE {id_column} IN UNNEST(@ids)"
+        job_config = bigquery.QueryJobConfig(query_parameters=[bigquery.ArrayQueryParameter("ids", "INT64", ids)])
+
+        try:
+            rows = self.client.query(query, job_config=job_config).result()
+            result = [dict(row.items()) for row in rows]
+
+            log.success(
+                "Successfully fetched {} rows by id from '{}' ({} ids requested)",
+                len(result),
+                table_id,
+                len(ids),
+            )
+            return result
+
+        except GoogleAPIError as api_error:
+            log.error("Google API Error during data fetch: {}", api_error)
+            raise
+
+        except Exception:
+            log.exception("An unexpected error occurred during data fetch.")
+            raise
+
     def upload_parquet_to_bq(self, file_path: str, full_table_id: str, write_disposition="WRITE_TRUNCATE") -> None:
         """
         Upload a Parquet file to a specified BigQuery table.
@@ -157,6 +296,44 @@ class BigQueryHandler:
             log.exception("An unexpected error occurred during file upload.")
             raise
 
+    def update_by_ids(self, table_id: str, dataframe: pd.DataFrame, id_column: str = "location_id") -> None:
+        """
+        Update the columns of `dataframe` in a table for the rows matching its id column, adding the missing (STRING) columns.
+        The rows are loaded into a `<table>_staging` table, then merged in a single statement.
+
+        Args:
+            table_id (str): Fully qualified table id, e.g. `project.dataset.table`.
+            dataframe (pd.DataFrame): The id column and the columns to update.
+            id_column (str): Name of the id column. Default: 'location_id'.
+        """
+        columns = [column for column in dataframe.columns if column != id_column]
+        if not _TABLE_ID_PATTERN.match(table_id):
+            raise ValueError(f"Invalid table id: {table_id}")
+        for identifier in [id_column, *columns]:
+            if not _IDENTIFIER_PATTERN.match(identifier):
+                raise ValueError(f"Invalid column name: {identifier}")
+
+        staging_table_id = f"{table_id}_staging"
+        try:
+            job_config = bigquery.LoadJobConfig(write_disposition="WRITE_TRUNCATE")
+            self.client.load_table_from_dataframe(dataframe, staging_table_id, job_config=job_config).result()
+
+            add_columns = ", ".join(f"ADD COLUMN IF NOT EXISTS {column} STRING" for column in columns)
+            self.client.query(f"ALTER TABLE `{table_id}` {add_columns}").result()
+
+            assignments = ", ".join(f"{column} = source.{column}" for column in columns)
+            self.client.query(
+                f"MERGE `{table_id}` AS target USING `{staging_table_id}` AS source "
+                f"ON target.{id_column} = source.{id_column} WHEN MATCHED THEN UPDATE SET {assignments}"
+            ).result()
+            log.success("Updated columns {} of {} rows in table '{}'", columns, len(dataframe), table_id)
+
+        except GoogleAPIError as api_error:
+            log.error("Google API Error during table update: {}", api_error)
+            raise
+        finally:
+            self.client.delete_table(staging_table_id, not_found_ok=True)
+
     def create_table(self, full_table_id: str, schema: list) -> None:
         """
         Creates a BigQuery table with a specified schema.
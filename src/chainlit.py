@@ -1,17 +1,31 @@
-import yaml
+import asyncio
+
 from literalai.helper import utc_now
 
 import chainlit as cl
-import chainlit.data as cl_data
 import chainlit.socket as cl_socket
 from chainlit.chat_context import chat_context
 from chainlit.config import config
 from chainlit.context import context
 from chainlit.types import MessagePayload
+from src.chat.cache import candidate_payload_cache
 from src.chat.chainlit import AskActionMessage
-from src.chat.utils import generate_conv_summary, generate_next_response, generate_streaming_response
-from src.core import get_chat_settings, init_user_session, remove_next_response_actions
-from src.helper.utils import encode_b64_string, get_admin_account, get_config_file, get_display_name, normalize_weights
+from src.chat.prefetch import cancel_speculative_search, start_speculative_search
+from src.chat.streaming import TokenStream, forward_token_stream, register_token_stream, unregister_token_stream
+from src.chat.usage import log_session_usage
+from src.core import (
+    append_message_history,
+    cancel_post_response_task,
+    get_chat_settings,
+    init_user_session,
+    load_message_history,
+    remove_next_response_actions,
+    start_background_warmup,
+    start_post_response_task,
+)
+from src.helper.utils import encode_b64_string, get_admin_account, get_display_name, normalize_weights
+from src.helper.vars import STARTER_MESSAGES
+from src.s3.preferences import preference_store
 
 
 @cl.password_auth_callback
@@ -27,12 +41,19 @@ def auth_callback(username: str, password: str):
         )
 
 
+@cl.on_app_startup
+def on_app_startup():
+    """Warm the app up in the background (ranking kernels), without delaying the server start."""
+    start_background_warmup()
+
+
 @cl.on_chat_start
 async def on_chat_start():
     """
     Initialize the user session, set up preferences, and send a welcome message.
     """
     username, welcome_msg = await init_user_session()
+    load_message_history()
 
     if not username or not welcome_msg:
         await cl.Message(content="Error initializing the chat. Please try again later.").send()
@@ -47,24 +68,7 @@ async def set_starters():
     Set the initial messages for the chat.
     This function initializes the chat with a welcome message and instructions.
     """
-    return [
-        cl.Starter(
-            label="I want to eat BBQ that is affordable",
-            message="I want to eat BBQ that is affordable",
-        ),
-        cl.Starter(
-            label="I want to eat sushi that is fresh and delicious.",
-            message="I want to eat sushi that is fresh and delicious.",
-        ),
-        cl.Starter(
-            label="I want to eat Pho at Ho Chi Minh City",
-            message="I want to eat Pho at Ho Chi Minh City",
-        ),
-        cl.Starter(
-            label="I really love French fine dining with great service and a nice atmosphere.",
-            message="I really love French fine dining with great service and a nice atmosphere.",
-        ),
-    ]
+    return [cl.Starter(label=starter_message, message=starter_message) for starter_message in STARTER_MESSAGES]
 
 
 @cl.on_message
@@ -77,73 +81,63 @@ async def on_message(message: cl.Message):
     # -- Agent processing message --
     agent = cl.user_session.get("agent")
     prefs = cl.user_session.get("user_preferences", {})
-    params_chat = {"user_preferences": prefs}
+    params_chat = {"user_preferences": prefs, "session_id": cl.user_session.get("id")}
 
-    # -- If any next user response actions are set, remove them --
+    # -- Drop follow-up generation of the previous answer, and its next user response actions --
+    cancel_post_response_task()
     await remove_next_response_actions()
+    append_message_history(message.content, "user")
+
+    # -- Search candidates on the raw message while the agent decides, the ranking tool reuses them if they fit --
+    start_speculative_search(cl.user_session.get("id"), message.content)
 
     if prefs.get("distance_preference", False):
         params_chat.update({"distance_preference": True, "distance_km": prefs["distance_km"]})
 
     try:
         msg = cl.Message(content="", author="assistant")
-        async_response = await cl.make_async(agent.params_chat)(message.content, **params_chat)
-        for chunk in generate_streaming_response(async_response, 0.025):
-            await msg.stream_token(chunk)
-
-        await msg.update()
-
-        # -- Generate conversation summary and update chat title --
-        cl.user_session.set("next_response_actions", [])
-        thread_data = await cl_data._data_layer.get_thread(message.thread_id)
-        print(f"Thread data: {thread_data}")
-        message_history = [
-            {"content": step["output"][:500], "role": "user" if step.get("type") == "user_message" else "assistant"}
-            for step in thread_data["steps"]
-            if step.get("type") in ["user_message", "assistant_message"]
-        ] + [{"content": msg.content[:500], "role": "assistant"}]
-
-        if len(message_history) > 0:
-            print(f"Actual conversation: {message_history}")
-            if len(str(msg.content)) < 1024:
-                next_response = await generate_next_response(message_history)
-                next_response_actions = [
-                    cl.Action(
-                        name="next_response",
-                        payload={"user_response": response},
-                        label=response,
-                    )
-                    for response in next_response.get("next_responses", [])
-                ]
-
-                cl.user_session.set("next_response_actions", next_response_actions)
-                msg.actions = next_response_actions
-                await msg.update()
-            else:
-                # send update preferences tool on recommendation
-                res = await AskActionMessage(
-                    content="So, I have ended up with some recommendations for you. Which one do you prefer?",
-                    actions=[
-                        cl.Action(name="food", payload={"score": "food_score"}, label="Good food"),
-                        cl.Action(name="ambience", payload={"score": "ambience_score"}, label="Great atmosphere"),
-                        cl.Action(name="price", payload={"score": "price_score"}, label="Affordable price"),
-                        cl.Action(name="service", payload={"score": "service_score"}, label="Excellent service"),
-                        cl.Action(name="cancel", payload={}, label="No, thanks!"),
-                    ],
-                    author="assistant",
-                    timeout=1200,
-                ).send()
-
-                if res and res.get("payload"):
-                    selected_score = res["payload"]["score"]
-
-                    await update_preferences(selected_score)
-                    await get_chat_settings().send()
-
-            if len(message_history) == 2:
-                conv_summary = await generate_conv_summary(message_history)
-                chat_title = conv_summary.title().replace(".", "")
-                await cl.context.emitter.init_thread(chat_title)
+        session_id = params_chat["session_id"]
+        token_stream = TokenStream()
+        register_token_stream(session_id, token_stream)
+        forward_tokens = asyncio.create_task(forward_token_stream(token_stream, msg))
+
+        try:
+            response = await cl.make_async(agent.params_stream_chat)(message.content, **params_chat)
+        finally:
+            token_stream.close()
+            await forward_tokens
+            unregister_token_stream(session_id)
+            cancel_speculative_search(session_id)
+
+        # -- The streamed text can miss parts (e.g. tool preambles), the final response is authoritative
+        msg.content = str(response)
+        await msg.update() if msg.streaming else await msg.send()
+
+        # -- Follow-up suggestions and chat title are generated in the background, the turn ends with the answer --
+        is_recommendation = len(str(msg.content)) >= 1024
+        append_message_history(msg.content, "assistant")
+        start_post_response_task(msg, suggest_next_responses=not is_recommendation)
+
+        if is_recommendation:
+            # send update preferences tool on recommendation
+            res = await AskActionMessage(
+                content="So, I have ended up with some recommendations for you. Which one do you prefer?",
+                actions=[
+                    cl.Action(name="food", payload={"score": "food_score"}, label="Good food"),
+                    cl.Action(name="ambience", payload={"score": "ambience_score"}, label="Great atmosphere"),
+                    cl.Action(name="price", payload={"score": "price_score"}, label="Affordable price"),
+                    cl.Action(name="service", payload={"score": "service_score"}, label="Excellent service"),
+                    cl.Action(name="cancel", payload={}, label="No, thanks!"),
+                ],
+                author="assistant",
+                timeout=1200,
+            ).send()
+
+            if res and res.get("payload"):
+                selected_score = res["payload"]["score"]
+
+                await update_preferences(selected_score)
+                await get_chat_settings().send()
 
     except Exception as e:
         await cl.Message(content=f"Error processing message: {e}", author="assistant").send()
@@ -185,13 +179,11 @@ async def handle_next_response_action(action: cl.Action):
 @cl.on_settings_update
 async def handle_settings_update(settings):
     """
-    Only update the preferences dict in memory & in S3. Do NOT re-init the agent here.
+    Only update the preferences dict in memory, the preference store writes it to S3 in the background. Do NOT re-init the agent here.
     """
     try:
-        config = cl.user_session.get("config")
         username: str = cl.user_session.get("username")
         prefs: dict = cl.user_session.get("user_preferences", {})
-        s3_client = cl.user_session.get("s3_client")
 
         prefs.update(
             {
@@ -204,8 +196,7 @@ async def handle_settings_update(settings):
             }
         )
 
-        config["preferences"][username] = prefs
-        s3_client.write_object(get_config_file(), yaml.dump(config))
+        preference_store.set(username, prefs)
         cl.user_session.set("user_preferences", prefs)
         await cl.context.emitter.send_toast("Settings updated successfully!", type="success")
     except Exception as e:
@@ -218,19 +209,23 @@ async def on_chat_resume(thread):
     if not thread or not cl.user_session.get("agent"):
         await init_user_session()
 
+    load_message_history((thread or {}).get("steps"))
+
 
 @cl.on_chat_end
 async def on_chat_end():
     """Clean up when chat ends"""
-    pass  # no-op
+    cancel_post_response_task()
+    candidate_payload_cache.clear(cl.user_session.get("id"))
+    log_session_usage(cl.user_session.get("id"))
+    if cl.user_session.get("username"):
+        await asyncio.to_thread(preference_store.flush, cl.user_session.get("username"))
 
 
 @cl.step(type="tool", name="update_preferences")
 async def update_preferences(selected_score: str):
-    config = cl.user_session.get("config")
     username = cl.user_session.get("username")
     prefs: dict = cl.user_session.get("user_preferences", {})
-    s3_client = cl.user_session.get("s3_client")
 
     messages = {
         "food_score": "Great! Let's find amazing food! 🍕 What's on your mind?",
@@ -245,8 +240,7 @@ async def update_preferences(selected_score: str):
     prefs.update({selected_score: tuned_selected_score})
     prefs = normalize_weights(prefs)
 
-    config["preferences"][username] = prefs
-    s3_client.write_object(get_config_file(), yaml.dump(config))
+    preference_store.set(username, prefs)
     cl.user_session.set("user_preferences", prefs)
 
     await cl.sleep(1.0)
@@ -1,5 +1,8 @@
+import contextvars
+import copy
 import json
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, List, Optional, Sequence, Union
 
 import llama_index.core.instrumentation as instrument
@@ -16,7 +19,7 @@ from llama_index.core.agent.function_calling.step import (
 from llama_index.core.agent.runner.base import AgentState
 from llama_index.core.agent.types import Task, TaskStep, TaskStepOutput
 from llama_index.core.agent.utils import add_user_step_to_memory
-from llama_index.core.base.llms.types import ChatMessage, MessageRole
+from llama_index.core.base.llms.types import ChatMessage, ChatResponse, MessageRole
 from llama_index.core.callbacks import (
     CallbackManager,
     CBEventType,
@@ -42,15 +45,35 @@ from llama_index.core.settings import Settings
 from llama_index.core.tools import BaseTool, ToolOutput
 from llama_index.core.tools.types import ToolMetadata
 from loguru import logger as log
+from openai.types.chat.chat_completion_message_tool_call import ChatCompletionMessageToolCall, Function
 
 from src.chat.prompt import AGENT_SYSTEM_PROMPT
+from src.chat.router import IntentRouter
+from src.chat.semantic_cache import SemanticResponseCache
+from src.chat.streaming import get_token_stream
+from src.chat.usage import record_usage
+from src.helper.vars import RANKING_TOOL_NAME, TOOL_CALL_WORKERS
 
 dispatcher = instrument.get_dispatcher(__name__)
 
+# -- Shared by every session: bounds the tool calls running at once in the process --
+tool_call_executor = ThreadPoolExecutor(max_workers=TOOL_CALL_WORKERS, thread_name_prefix="tool-call")
+
 
 class ParseParamsAgent(FunctionCallingAgent):
     """Override chat method to parse and forward custom parameters to tool calls."""
 
+    def __init__(
+        self,
+        *args,
+        response_cache: Optional[SemanticResponseCache] = None,
+        router: Optional[IntentRouter] = None,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.response_cache = response_cache
+        self.router = router
+
     @staticmethod
     def from_tools(
         tools: Optional[List[BaseTool]] = None,
@@ -65,6 +88,8 @@ class ParseParamsAgent(FunctionCallingAgent):
         chat_history: Optional[List[ChatMessage]] = None,
         state: Optional[AgentState] = None,
         allow_parallel_tool_calls: bool = True,
+        response_cache: Optional[SemanticResponseCache] = None,
+        router: Optional[IntentRouter] = None,
         **additional_kwargs: Any,
     ) -> "FunctionCallingAgent":
         """Create a FunctionCallingAgent from a list of tools."""
@@ -102,6 +127,8 @@ class ParseParamsAgent(FunctionCallingAgent):
             llm=llm,
             callback_manager=callback_manager,
             verbose=verbose,
+            response_cache=response_cache,
+            router=router,
             **additional_kwargs,
         )
 
@@ -112,6 +139,37 @@ class ParseParamsAgent(FunctionCallingAgent):
         tool_choice: Optional[Union[str, dict]] = None,
         **additional_kwargs,
     ) -> AgentChatResponse:
+        return self._params_chat(message, chat_history, tool_choice, ChatResponseMode.WAIT, **additional_kwargs)
+
+    def params_stream_chat(
+        self,
+        message: str,
+        chat_history: Optional[List[ChatMessage]] = None,
+        tool_choice: Optional[Union[str, dict]] = None,
+        **additional_kwargs,
+    ) -> AgentChatResponse:
+        """
+        Like `params_chat`, but LLM text is forwarded to the token stream registered for
+        `additional_kwargs["session_id"]` while it is generated. Returns the complete response.
+        """
+        return self._params_chat(message, chat_history, tool_choice, ChatResponseMode.STREAM, **additional_kwargs)
+
+    def _params_chat(
+        self,
+        message: str,
+        chat_history: Optional[List[ChatMessage]],
+        tool_choice: Optional[Union[str, dict]],
+        mode: ChatResponseMode,
+        **additional_kwargs,
+    ) -> AgentChatResponse:
+        # -- Near-identical requests with the same city and preferences reuse the cached recommendation
+        preferences = additional_kwargs.get("user_preferences")
+        cached_response = self.response_cache.get(message, preferences) if self.response_cache else None
+        if cached_response is not None:
+            self.memory.put(ChatMessage(content=message, role=MessageRole.USER))
+            self.memory.put(ChatMessage(content=cached_response, role=MessageRole.ASSISTANT))
+            return AgentChatResponse(response=cached_response)
+
         if tool_choice is None:
             tool_choice = self.default_tool_choice
         with self.callback_manager.event(
@@ -122,11 +180,14 @@ class ParseParamsAgent(FunctionCallingAgent):
                 message=message,
                 chat_history=chat_history,
                 tool_choice=tool_choice,
-                mode=ChatResponseMode.WAIT,
+                mode=mode,
                 **additional_kwargs,
             )
             assert isinstance(chat_response, AgentChatResponse)
             e.on_end(payload={EventPayload.RESPONSE: chat_response})
+
+        if self.response_cache and self.response_cache.put(message, preferences, chat_response.response, chat_response.sources):
+            log.info(f"Cached the recommendation for: {message}")
         return chat_response
 
     @dispatcher.span
@@ -142,6 +203,11 @@ class ParseParamsAgent(FunctionCallingAgent):
             self.memory.set(chat_history)
         task = self.create_task(message)
 
+        # -- Simple requests get the ranking tool call from the local router instead of the first LLM round trip
+        routed_arguments = self.router.route(message) if self.router else None
+        if routed_arguments is not None:
+            task.extra_state["routed_tool_call"] = (RANKING_TOOL_NAME, routed_arguments)
+
         result_output = None
         dispatcher.event(AgentChatWithStepStartEvent(user_msg=message))
         while True:
@@ -211,13 +277,64 @@ class ParseParamsAgentWorker(FunctionCallingAgentWorker):
         tools = self.get_tools(task.input)
 
         # get response and tool call (if exists)
-        response = self._llm.chat_with_tools(
+        response = self._get_routed_response(task) or self._llm.chat_with_tools(
             tools=tools,
             user_msg=None,
             chat_history=self.get_all_messages(task),
             verbose=self._verbose,
             allow_parallel_tool_calls=self.allow_parallel_tool_calls,
         )
+        record_usage("agent", getattr(response.raw, "usage", None), additional_kwargs.get("session_id"))
+        return self._handle_llm_response(step, task, tools, response, **additional_kwargs)
+
+    @trace_method("run_step")
+    def stream_step(self, step: TaskStep, task: Task, **additional_kwargs) -> TaskStepOutput:
+        """Run step, forwarding the LLM text deltas to the session token stream as they arrive."""
+        token_stream = get_token_stream(additional_kwargs.get("session_id"))
+        if step.input is not None:
+            add_user_step_to_memory(step, task.extra_state["new_memory"], verbose=self._verbose)
+        tools = self.get_tools(task.input)
+
+        response = self._get_routed_response(task)
+        if response is None:
+            # the last streamed response holds the full message and tool calls
+            for response in self._llm.stream_chat_with_tools(
+                tools=tools,
+                user_msg=None,
+                chat_history=self.get_all_messages(task),
+                verbose=self._verbose,
+                allow_parallel_tool_calls=self.allow_parallel_tool_calls,
+            ):
+                if token_stream is not None and response.delta:
+                    token_stream.put(response.delta)
+            # usage comes with the last chunk (stream_options include_usage)
+            record_usage("agent", getattr(response.raw, "usage", None), additional_kwargs.get("session_id"))
+
+        return self._handle_llm_response(step, task, tools, response, **additional_kwargs)
+
+    def _get_routed_response(self, task: Task) -> Optional[ChatResponse]:
+        """The assistant tool call message for the tool call set by the router on the task, if any (first step only)."""
+        routed_tool_call = task.extra_state.pop("routed_tool_call", None)
+        if routed_tool_call is None:
+            return None
+
+        tool_name, tool_arguments = routed_tool_call
+        tool_call = ChatCompletionMessageToolCall(
+            id=f"call_{uuid.uuid4().hex[:24]}",
+            type="function",
+            function=Function(name=tool_name, arguments=json.dumps(tool_arguments)),
+        )
+        return ChatResponse(message=ChatMessage(role=MessageRole.ASSISTANT, content=None, additional_kwargs={"tool_calls": [tool_call]}))
+
+    def _handle_llm_response(
+        self,
+        step: TaskStep,
+        task: Task,
+        tools: Sequence[BaseTool],
+        response: ChatResponse,
+        **additional_kwargs,
+    ) -> TaskStepOutput:
+        """Call the tools requested by the LLM response (if any) and build the step output."""
         tool_calls = self._llm.get_tool_calls_from_response(response, error_on_no_tool_call=False)
         tool_outputs: List[ToolOutput] = []
 
@@ -236,24 +353,26 @@ class ParseParamsAgentWorker(FunctionCallingAgentWorker):
             new_steps = []
         else:
             is_done = False
-            for i, tool_call in enumerate(tool_calls):
-                # TODO: maybe execute this with multi-threading
-                return_direct = self._call_function(
+            # a return_direct first call ends the step with its own output, the other calls are not run
+            first_tool = get_function_by_name(tools, tool_calls[0].tool_name)
+            if first_tool is not None and first_tool.metadata.return_direct:
+                tool_calls = tool_calls[:1]
+
+            # run the calls concurrently, then record their outputs in call order
+            for tool_call, tool_output in zip(tool_calls, self._call_functions(tools, tool_calls, **additional_kwargs)):
+                return_direct = self._record_function_output(
                     tools,
                     tool_call,
+                    tool_output,
                     task.extra_state["new_memory"],
                     tool_outputs,
-                    verbose=self._verbose,
-                    **additional_kwargs,
                 )
-                task.extra_state["sources"].append(tool_outputs[-1])
+                task.extra_state["sources"].append(tool_output)
                 task.extra_state["n_function_calls"] += 1
 
-                # check if any of the tools return directly -- only works if there is one tool call
-                if i == 0 and return_direct:
-                    is_done = True
-                    response = task.extra_state["sources"][-1].content
-                    break
+            if len(tool_calls) == 1 and return_direct:
+                is_done = True
+                response = task.extra_state["sources"][-1].content
 
             # put tool output in sources and memory
             new_steps = (
@@ -284,15 +403,39 @@ class ParseParamsAgentWorker(FunctionCallingAgentWorker):
             next_steps=new_steps,
         )
 
+    def _call_functions(
+        self,
+        tools: Sequence[BaseTool],
+        tool_calls: List[ToolSelection],
+        **additional_kwargs,
+    ) -> List[ToolOutput]:
+        """
+        Run the tool calls of a step and return their outputs in call order.
+        Several calls run concurrently on `tool_call_executor`, each in a copy of the caller context (Chainlit session, ...).
+        """
+        if len(tool_calls) == 1:
+            return [self._call_function(tools, tool_calls[0], verbose=self._verbose, **additional_kwargs)]
+
+        futures = [
+            tool_call_executor.submit(
+                contextvars.copy_context().run,
+                self._call_function,
+                tools,
+                tool_call,
+                verbose=self._verbose,
+                **additional_kwargs,
+            )
+            for tool_call in tool_calls
+        ]
+        return [future.result() for future in futures]
+
     def _call_function(
         self,
         tools: Sequence[BaseTool],
         tool_call: ToolSelection,
-        memory: BaseMemory,
-        sources: List[ToolOutput],
         verbose: bool = False,
         **additional_kwargs,
-    ) -> bool:
+    ) -> ToolOutput:
         tool = get_function_by_name(tools, tool_call.tool_name)
         tool_args_str = json.dumps(tool_call.tool_kwargs)
         tool_metadata = tool.metadata if tool is not None else ToolMetadata(description="", name=tool_call.tool_name)
@@ -310,8 +453,22 @@ class ParseParamsAgentWorker(FunctionCallingAgentWorker):
                 if tool is not None
                 else build_missing_tool_output(tool_call)
             )
-            event.on_end(payload={EventPayload.FUNCTION_OUTPUT: str(tool_output)})
+            # the UI step shows the full-precision output when the tool keeps one (e.g. the candidate ranking)
+            display_output = getattr(tool_output.raw_output, "to_display", lambda: str(tool_output))()
+            event.on_end(payload={EventPayload.FUNCTION_OUTPUT: display_output})
+
+        return tool_output
 
+    def _record_function_output(
+        self,
+        tools: Sequence[BaseTool],
+        tool_call: ToolSelection,
+        tool_output: ToolOutput,
+        memory: BaseMemory,
+        sources: List[ToolOutput],
+    ) -> bool:
+        """Put a tool output in the sources and memory. Returns whether the tool is return_direct."""
+        tool = get_function_by_name(tools, tool_call.tool_name)
         function_message = ChatMessage(
             content=str(tool_output),
             role=MessageRole.TOOL,
@@ -352,7 +509,8 @@ class ParseParamsAgentWorker(FunctionCallingAgentWorker):
     ) -> ToolOutput:
         tools_by_name = {tool.metadata.name: tool for tool in tools}
         name = tool_call.tool_name
-        tool_call.tool_kwargs.update(kwargs_dict=additional_kwargs)
+        # each call gets its own copy: tools may update the preferences, and calls can run concurrently
+        tool_call.tool_kwargs.update(kwargs_dict=copy.deepcopy(additional_kwargs))
         if verbose:
             arguments_str = json.dumps(tool_call.tool_kwargs)
             log.info("=== Calling Function ===")
@@ -0,0 +1,78 @@
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+from src.helper.cache import LRUCache
+from src.helper.vars import DESCRIPTION_CACHE_SIZE, DESCRIPTION_CACHE_TTL, SESSION_CACHE_SIZE, SESSION_CACHE_TTL, SESSION_CANDIDATE_LIMIT
+
+
+class CandidatePayloadCache:
+    """
+    Per-session payloads of the ranked candidates.
+    Filled by `candidate_generation_and_ranking` from the Qdrant payloads it already has,
+    read by `enrich_restaurant_recommendations` so a recommendation turn needs no second feature store round trip.
+    """
+
+    def __init__(self, maxsize: int = SESSION_CACHE_SIZE, ttl: Optional[float] = SESSION_CACHE_TTL):
+        self._sessions = LRUCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def put(self, session_id: Optional[str], payloads: Iterable[dict], query: Optional[str] = None) -> None:
+        """Store the candidate payloads of a session, keyed by location_id, with the query that retrieved them."""
+        if not session_id:
+            return
+
+        # -- concurrent tool calls of a session must not each create the session entry and overwrite the other --
+        with self._lock:
+            candidates = self._sessions.get(session_id)
+            if candidates is None:
+                candidates = LRUCache(maxsize=SESSION_CANDIDATE_LIMIT)
+            for payload in payloads:
+                candidates.set(int(payload["location_id"]), (dict(payload), query))
+            self._sessions.set(session_id, candidates)
+
+    def get_many(self, session_id: Optional[str], location_ids: Iterable[int]) -> Dict[int, dict]:
+        """Return the cached payloads of a session for `location_ids`. Ids that are not cached are skipped."""
+        return {_id: dict(payload) for _id, (payload, _) in self._get_entries(session_id, location_ids).items()}
+
+    def get_queries(self, session_id: Optional[str], location_ids: Iterable[int]) -> Dict[int, str]:
+        """Return the query that retrieved each of `location_ids` in a session. Ids without a query are skipped."""
+        return {_id: query for _id, (_, query) in self._get_entries(session_id, location_ids).items() if query}
+
+    def _get_entries(self, session_id: Optional[str], location_ids: Iterable[int]) -> Dict[int, Tuple[dict, Optional[str]]]:
+        candidates = self._sessions.get(session_id) if session_id else None
+        if candidates is None:
+            return {}
+
+        entries = {int(_id): candidates.get(int(_id)) for _id in location_ids}
+        return {_id: entry for _id, entry in entries.items() if entry is not None}
+
+    def clear(self, session_id: Optional[str]) -> None:
+        """Drop every payload of a session."""
+        if session_id:
+            with self._lock:
+                self._sessions.pop(session_id)
+
+
+class RestaurantDescriptionCache:
+    """
+    Process-wide cache of the LLM-written `short_description` of restaurants, keyed by location_id and query intent,
+    so the same restaurant is not described again for every user looking for the same thing.
+    """
+
+    def __init__(self, maxsize: int = DESCRIPTION_CACHE_SIZE, ttl: Optional[float] = DESCRIPTION_CACHE_TTL):
+        self._descriptions = LRUCache(maxsize=maxsize, ttl=ttl)
+
+    def get_many(self, intents: Dict[int, str]) -> Dict[int, str]:
+        """Return the cached descriptions for `{location_id: intent}`. Misses are skipped."""
+        descriptions = {_id: self._descriptions.get((_id, intent)) for _id, intent in intents.items()}
+        return {_id: description for _id, description in descriptions.items() if description}
+
+    def put_many(self, descriptions: Dict[int, str], intents: Dict[int, str]) -> None:
+        """Store the descriptions of `{location_id: description}` under the intent of each location."""
+        for _id, description in descriptions.items():
+            if description and _id in intents:
+                self._descriptions.set((_id, intents[_id]), description)
+
+
+candidate_payload_cache = CandidatePayloadCache()
+restaurant_description_cache = RestaurantDescriptionCache()
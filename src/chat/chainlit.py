@@ -1,6 +1,9 @@
-from typing import List, Union, cast
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Union, cast
 
 from literalai.helper import utc_now
+from llama_index.core.callbacks import CBEventType
+from llama_index.core.callbacks.token_counting import get_llm_token_counts
 
 from chainlit import LlamaIndexCallbackHandler
 from chainlit.action import Action
@@ -13,16 +16,37 @@ from chainlit.types import (
     AskActionSpec,
 )
 
+# -- Tokens of the LLM event being ended, read by the Chainlit handler as `total_llm_token_count` --
+_event_token_count: ContextVar[int] = ContextVar("event_token_count", default=0)
+
 
 class ChainlitStatusCallback(LlamaIndexCallbackHandler):
-    """Chainlit callback handler for LlamaIndex events."""
-
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        # No additional initialization needed
-        # This class is used to integrate with Chainlit's callback system
-        # NOTE: Custom if needed
-        pass
+    """
+    Chainlit callback handler for LlamaIndex events.
+    One instance is shared by every session, so it keeps no running token count:
+    each LLM step shows the tokens of its own call.
+    """
+
+    def on_event_end(self, event_type: CBEventType, payload: Optional[Dict[str, Any]] = None, event_id: str = "", **kwargs: Any) -> None:
+        token_count = 0
+        if event_type == CBEventType.LLM and payload is not None:
+            try:
+                token_count = get_llm_token_counts(self._token_counter, payload, event_id).total_token_count
+            except ValueError:
+                pass
+
+        reset_token = _event_token_count.set(token_count)
+        try:
+            super().on_event_end(event_type, payload=payload, event_id=event_id, **kwargs)
+        finally:
+            _event_token_count.reset(reset_token)
+
+    @property
+    def total_llm_token_count(self) -> int:
+        return _event_token_count.get()
+
+    def reset_counts(self) -> None:
+        """Nothing is accumulated."""
 
 
 class AskActionMessage(AskMessageBase):
@@ -1,33 +1,52 @@
 import os
 
+import httpx
 from llama_index.llms.openai import OpenAI as AgentOpenAI
-from openai import AsyncOpenAI
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient
 from openai import OpenAI as CoreOpenAI
 
-from src.bigquery.handler import BigQueryHandler
-from src.helper.vars import FEATURE_STORAGE_MODE, OPENAI_CONFIG, OPENAI_MODEL
+from src.helper.lazy import LazyObject
+from src.helper.vars import OPENAI_CONFIG, OPENAI_MAX_CONNECTIONS, OPENAI_MODEL
+from src.qdrant.embedding import EmbeddingService
 from src.qdrant.query import QdrantQuery
 
-agent_llm_model = AgentOpenAI(**OPENAI_CONFIG, model=OPENAI_MODEL, streaming=False)
-core_llm_model = CoreOpenAI(**OPENAI_CONFIG)
-async_core_llm_model = AsyncOpenAI(**OPENAI_CONFIG)
+# -- Clients and models are built on first use, importing this module opens no connection and loads no model --
 
-qdrant_client_location = QdrantQuery(
-    qdrant_api_url=os.environ.get("QDRANT_API_URL"),
-    qdrant_api_key=os.environ.get("QDRANT__SERVICE__API_KEY"),
-    collection_name="tripadvisor_locations",
+# -- One connection pool per transport, shared by every OpenAI client of the process (and so by every session) --
+openai_http_limits = httpx.Limits(max_connections=OPENAI_MAX_CONNECTIONS, max_keepalive_connections=OPENAI_MAX_CONNECTIONS)
+openai_http_client = LazyObject(lambda: DefaultHttpxClient(limits=openai_http_limits))
+openai_async_http_client = LazyObject(lambda: DefaultAsyncHttpxClient(limits=openai_http_limits))
+
+agent_llm_model = LazyObject(
+    lambda: AgentOpenAI(
+        **OPENAI_CONFIG,
+        model=OPENAI_MODEL,
+        streaming=False,
+        additional_kwargs={"stream_options": {"include_usage": True}},
+        http_client=openai_http_client.get(),
+        async_http_client=openai_async_http_client.get(),
+    )
 )
+core_llm_model = LazyObject(lambda: CoreOpenAI(**OPENAI_CONFIG, http_client=openai_http_client.get()))
+async_core_llm_model = LazyObject(lambda: AsyncOpenAI(**OPENAI_CONFIG, http_client=openai_async_http_client.get()))
+
+# -- Single BGE model of the process, micro-batching the embeddings of every session (loaded on the first embed) --
+embedding_service = EmbeddingService()
 
-qdrant_client_geolocation = QdrantQuery(
-    qdrant_api_url=os.environ.get("QDRANT_API_URL"),
-    qdrant_api_key=os.environ.get("QDRANT__SERVICE__API_KEY"),
-    collection_name="tripadvisor_geolocations",
+qdrant_client_location = LazyObject(
+    lambda: QdrantQuery(
+        qdrant_api_url=os.environ.get("QDRANT_API_URL"),
+        qdrant_api_key=os.environ.get("QDRANT__SERVICE__API_KEY"),
+        collection_name="tripadvisor_locations",
+        embedder=embedding_service,
+    )
 )
 
-if FEATURE_STORAGE_MODE == "local":
-    bigquery_client = None
-else:
-    bigquery_client = BigQueryHandler(
-        project_id="tripadvisor-recommendations",
-        credentials_path=os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "sa.json"),
+# -- Same Qdrant connection as the locations collection --
+qdrant_client_geolocation = LazyObject(
+    lambda: QdrantQuery(
+        collection_name="tripadvisor_geolocations",
+        client=qdrant_client_location.client,
+        embedder=embedding_service,
     )
+)
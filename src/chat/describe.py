@@ -0,0 +1,145 @@
+import asyncio
+import json
+import os
+from typing import Dict, List, Optional
+
+import pandas as pd
+from loguru import logger as log
+
+from src.chat.client import async_core_llm_model
+from src.chat.models import RestaurantDescriptionBatch
+from src.chat.prompt import DESCRIBE_CONTEXT, DESCRIBE_PROMPT
+from src.chat.usage import record_usage
+from src.feature_store.base import FeatureStore
+from src.helper.vars import DESCRIPTION_BATCH_SIZE, DESCRIPTION_COLUMN, DESCRIPTION_CONCURRENCY, OPENAI_MODEL
+
+# -- Fields of a location given to the LLM to describe it --
+DESCRIBE_INPUT_COLUMNS = ["location_id", "location_name", "city", "cuisine_list", "price_range", "location_text_nlp"]
+
+
+class RestaurantDescriptionPrecomputer:
+    """
+    Offline job writing a query-independent `short_description` for every location of the feature store.
+    Restaurants are described in batches (one LLM request per batch) with bounded concurrency. Every finished batch
+    is appended to a JSONL checkpoint, so an interrupted run resumes where it stopped.
+    """
+
+    def __init__(
+        self,
+        feature_store: FeatureStore,
+        checkpoint_path: str,
+        batch_size: int = DESCRIPTION_BATCH_SIZE,
+        concurrency: int = DESCRIPTION_CONCURRENCY,
+        overwrite: bool = False,
+        max_retries: int = 3,
+    ):
+        """
+        Initialize the RestaurantDescriptionPrecomputer.
+
+        Args:
+            feature_store (FeatureStore): Store to read the locations from and write the descriptions to.
+            checkpoint_path (str): JSONL file of the descriptions generated so far.
+            batch_size (int): Restaurants described per LLM request.
+            concurrency (int): Maximum number of LLM requests in flight.
+            overwrite (bool): Describe again the locations that already have a description in the feature store.
+            max_retries (int): Attempts per batch before it is left for the next run.
+        """
+        self.feature_store = feature_store
+        self.checkpoint_path = checkpoint_path
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.overwrite = overwrite
+        self.max_retries = max_retries
+
+    def run(self) -> int:
+        """
+        Describe the pending locations, then write every checkpointed description back to the feature store.
+
+        Returns:
+            int: Number of descriptions written to the feature store.
+        """
+        locations = self.feature_store.read_all()
+        descriptions = self.load_checkpoint()
+
+        pending = locations[~locations[self.feature_store.id_column].astype(int).isin(descriptions)]
+        if not self.overwrite and DESCRIPTION_COLUMN in pending.columns:
+            pending = pending[pending[DESCRIPTION_COLUMN].fillna("").str.strip() == ""]
+        log.info(f"{len(descriptions)} descriptions checkpointed, {len(pending)} locations left to describe.")
+
+        if not pending.empty:
+            records = pending[[column for column in DESCRIBE_INPUT_COLUMNS if column in pending.columns]].to_dict("records")
+            descriptions.update(asyncio.run(self.describe_all(records)))
+
+        if descriptions:
+            self.feature_store.write_columns(
+                pd.DataFrame({self.feature_store.id_column: list(descriptions), DESCRIPTION_COLUMN: list(descriptions.values())})
+            )
+        return len(descriptions)
+
+    def load_checkpoint(self) -> Dict[int, str]:
+        """Read the descriptions of the previous (possibly interrupted) runs."""
+        if not os.path.exists(self.checkpoint_path):
+            return {}
+
+        descriptions = {}
+        with open(self.checkpoint_path, "r", encoding="utf-8") as file:
+            for line in file:
+                if line.strip():
+                    item = json.loads(line)
+                    descriptions[int(item["location_id"])] = item[DESCRIPTION_COLUMN]
+        return descriptions
+
+    async def describe_all(self, records: List[dict]) -> Dict[int, str]:
+        """Describe `records` batch by batch, checkpointing every batch as soon as it is done."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        batches = [records[i : i + self.batch_size] for i in range(0, len(records), self.batch_size)]
+        tasks = [asyncio.create_task(self.describe_batch(batch, semaphore)) for batch in batches]
+
+        descriptions = {}
+        with open(self.checkpoint_path, "a", encoding="utf-8") as checkpoint:
+            for done, task in enumerate(asyncio.as_completed(tasks), start=1):
+                batch_descriptions = await task
+                for _id, description in batch_descriptions.items():
+                    checkpoint.write(json.dumps({"location_id": _id, DESCRIPTION_COLUMN: description}, ensure_ascii=False) + "\n")
+                checkpoint.flush()
+                descriptions.update(batch_descriptions)
+                log.info(f"Described batch {done}/{len(batches)} ({len(descriptions)} restaurants).")
+
+        return descriptions
+
+    async def describe_batch(self, batch: List[dict], semaphore: asyncio.Semaphore) -> Dict[int, str]:
+        """
+        Describe a batch of restaurants in one structured-output request.
+        Returns the descriptions of the batch ids only; a batch failing every attempt returns nothing.
+        """
+        batch_ids = {int(record["location_id"]) for record in batch}
+        llm_params = {
+            "messages": [
+                {"role": "developer", "content": DESCRIBE_PROMPT},
+                {"role": "user", "content": DESCRIBE_CONTEXT.format(restaurants="\n\n".join(str(record) for record in batch))},
+            ],
+            "model": OPENAI_MODEL,
+            "temperature": 0.3,
+            "response_format": RestaurantDescriptionBatch,
+        }
+
+        async with semaphore:
+            for attempt in range(1, self.max_retries + 1):
+                try:
+                    completion = await async_core_llm_model.beta.chat.completions.parse(**llm_params)
+                    record_usage("describe", completion.usage)
+                    parsed: Optional[RestaurantDescriptionBatch] = completion.choices[0].message.parsed
+                    if parsed is None:
+                        raise ValueError(completion.choices[0].message.refusal or "Empty response")
+
+                    return {
+                        int(item.location_id): item.short_description.strip()
+                        for item in parsed.restaurants
+                        if item.location_id.isdigit() and int(item.location_id) in batch_ids and item.short_description.strip()
+                    }
+                except Exception as e:
+                    log.warning(f"Batch of {len(batch)} restaurants failed (attempt {attempt}/{self.max_retries}): {e}")
+                    if attempt < self.max_retries:
+                        await asyncio.sleep(2**attempt)
+
+        return {}
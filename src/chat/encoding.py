@@ -0,0 +1,68 @@
+import csv
+import io
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Literal
+
+import pandas as pd
+from tabulate import tabulate
+
+from src.helper.vars import CANDIDATE_ENCODING, CANDIDATE_SCORE_DECIMALS
+
+CandidateEncoding = Literal["github", "csv", "compact"]
+# -- Short column keys of the compact encoding --
+COMPACT_KEYS = {"location_id": "id", "location_name": "name", "query_matching_score": "match"}
+
+
+def encode_candidates(
+    records: List[Dict[str, Any]],
+    encoding: CandidateEncoding = CANDIDATE_ENCODING,
+    decimals: int = CANDIDATE_SCORE_DECIMALS,
+) -> str:
+    """
+    Encode the ranked candidates for the LLM.
+
+    Args:
+        records (List[Dict[str, Any]]): Ranked candidates (location_id, location_name and `_score` columns).
+        encoding (CandidateEncoding): 'github' is the full-precision markdown table, 'csv' rounds the scores,
+            'compact' also shortens the keys (`food_score` -> `food`, `location_id` -> `id`, ...).
+        decimals (int): Decimals of the scores in the 'csv' and 'compact' encodings.
+
+    Returns:
+        str: The encoded candidates.
+    """
+    if encoding == "github":
+        return tabulate(records, headers="keys", tablefmt="github")
+    if encoding not in ("csv", "compact"):
+        raise ValueError(f"Invalid candidate encoding: {encoding}. Available encodings: github, csv, compact")
+
+    columns = list(records[0].keys()) if records else []
+    header = [COMPACT_KEYS.get(column, column.removesuffix("_score")) if encoding == "compact" else column for column in columns]
+    round_value = lambda value: round(value, decimals) if isinstance(value, float) else value
+
+    output = io.StringIO()
+    writer = csv.writer(output, lineterminator="\n")
+    writer.writerow(header)
+    writer.writerows([[round_value(record.get(column)) for column in columns] for record in records])
+    return output.getvalue().rstrip("\n")
+
+
+@dataclass
+class CandidateRanking:
+    """
+    Output of the ranking tool. The LLM (tool message in memory) gets the compact encoding through `str`,
+    the full-precision ranking stays in `records` (`ToolOutput.raw_output`) for the UI.
+    """
+
+    records: List[Dict[str, Any]] = field(default_factory=list)
+    encoding: CandidateEncoding = CANDIDATE_ENCODING
+
+    @classmethod
+    def from_dataframe(cls, dataframe: pd.DataFrame, encoding: CandidateEncoding = CANDIDATE_ENCODING) -> "CandidateRanking":
+        return cls(records=dataframe.to_dict("records"), encoding=encoding)
+
+    def to_display(self) -> str:
+        """Full-precision markdown table, shown in the UI tool step."""
+        return encode_candidates(self.records, encoding="github")
+
+    def __str__(self) -> str:
+        return encode_candidates(self.records, encoding=self.encoding)
@@ -0,0 +1,123 @@
+import csv
+import io
+import re
+from typing import Any, List, Optional
+
+from llama_index.core.base.llms.types import ChatMessage, MessageRole
+from llama_index.core.memory import ChatMemoryBuffer
+from loguru import logger as log
+from pydantic import PrivateAttr
+
+from src.helper.cache import LRUCache
+from src.helper.vars import ENRICH_TOOL_NAME, MEMORY_CACHE_SIZE, MEMORY_RECENT_TURNS, MEMORY_TOOL_SUMMARY_CHARS, RANKING_TOOL_NAME
+
+# -- Restaurant headings of the enrichment answer, see `render_location_card` --
+RECOMMENDATION_HEADING = re.compile(r"^### \*\*(.+?)\*\*", re.MULTILINE)
+
+
+def summarize_tool_output(tool_name: Optional[str], content: str, max_chars: int = MEMORY_TOOL_SUMMARY_CHARS) -> str:
+    """
+    Deterministic short summary of a tool output kept in the agent memory.
+    The same output always gives the same summary, so the compressed history stays a stable prompt prefix.
+
+    Args:
+        tool_name (Optional[str]): Name of the tool that produced the output.
+        content (str): The tool output sent to the LLM.
+        max_chars (int): Length of the generic (truncated) summary.
+
+    Returns:
+        str: The summary, or `content` itself when it is already short.
+    """
+    if len(content) <= max_chars:
+        return content
+
+    if tool_name == RANKING_TOOL_NAME:
+        rows = list(csv.reader(io.StringIO(content)))
+        header = rows[0] if rows else []
+        for id_key, name_key in [("id", "name"), ("location_id", "location_name")]:
+            if id_key in header and name_key in header:
+                id_index, name_index = header.index(id_key), header.index(name_key)
+                candidates = [f"{row[id_index]} {row[name_index]}" for row in rows[1:] if len(row) == len(header)]
+                return f"[Ranked {len(candidates)} candidates (id name), best first: {'; '.join(candidates)}]"
+
+    if tool_name == ENRICH_TOOL_NAME:
+        names = RECOMMENDATION_HEADING.findall(content)
+        if names:
+            return f"[Recommended to the user: {'; '.join(names)}]"
+
+    return f"{content[:max_chars].rstrip()} ...[truncated]"
+
+
+class SummarizingChatMemory(ChatMemoryBuffer):
+    """
+    Agent memory keeping the context under `token_limit` without re-tokenizing the whole history on every `get`.
+    - Token counts are cached per message content, only new messages are tokenized.
+    - Tool outputs older than the last `recent_turns` turns are replaced by `summarize_tool_output`
+      (the message and its `tool_call_id` stay, so the assistant tool calls remain answered).
+    - Over budget, whole turns (from a user message to the next one) are dropped from the oldest.
+      The latest turn is always kept, its tool outputs summarized if it alone is over budget.
+    """
+
+    recent_turns: int = MEMORY_RECENT_TURNS
+    _token_counts: LRUCache = PrivateAttr(default_factory=lambda: LRUCache(maxsize=MEMORY_CACHE_SIZE))
+    _summaries: LRUCache = PrivateAttr(default_factory=lambda: LRUCache(maxsize=MEMORY_CACHE_SIZE))
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "SummarizingChatMemory"
+
+    def get(self, input: Optional[str] = None, initial_token_count: int = 0, **kwargs: Any) -> List[ChatMessage]:
+        """Get the chat history to send to the LLM: compressed, then trimmed to the token budget."""
+        if initial_token_count > self.token_limit:
+            raise ValueError("Initial token count exceeds token limit")
+
+        turns = self._split_turns(self.get_all())
+        turns = [
+            [self._compress(message) for message in turn] if index < len(turns) - self.recent_turns else turn for index, turn in enumerate(turns)
+        ]
+
+        turn_tokens = [sum(self._token_count(message) for message in turn) for turn in turns]
+        token_count = initial_token_count + sum(turn_tokens)
+        dropped = 0
+        while dropped < len(turns) - 1 and token_count > self.token_limit:
+            token_count -= turn_tokens[dropped]
+            dropped += 1
+
+        if dropped:
+            log.debug(f"Chat memory over {self.token_limit} tokens, dropped the {dropped} oldest of {len(turns)} turns.")
+        # -- the latest turn is always kept, with its tool outputs summarized when it alone is over the budget --
+        if turns and token_count > self.token_limit:
+            turns[-1] = [self._compress(message) for message in turns[-1]]
+        return [message for turn in turns[dropped:] for message in turn]
+
+    def _split_turns(self, messages: List[ChatMessage]) -> List[List[ChatMessage]]:
+        """Group the messages in turns, each starting at a user message."""
+        turns: List[List[ChatMessage]] = []
+        for message in messages:
+            if message.role == MessageRole.USER or not turns:
+                turns.append([])
+            turns[-1].append(message)
+        return turns
+
+    def _compress(self, message: ChatMessage) -> ChatMessage:
+        """Replace a tool output by its summary, other messages are returned as is."""
+        if message.role != MessageRole.TOOL or not message.content:
+            return message
+
+        tool_name = message.additional_kwargs.get("name")
+        key = (tool_name, message.content)
+        summary = self._summaries.get(key)
+        if summary is None:
+            summary = summarize_tool_output(tool_name, message.content)
+            self._summaries.set(key, summary)
+        if summary == message.content:
+            return message
+        return ChatMessage(role=message.role, content=summary, additional_kwargs=message.additional_kwargs)
+
+    def _token_count(self, message: ChatMessage) -> int:
+        content = str(message.content)
+        count = self._token_counts.get(content)
+        if count is None:
+            count = len(self.tokenizer_fn(content))
+            self._token_counts.set(content, count)
+        return count
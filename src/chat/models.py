@@ -8,6 +8,10 @@ class RestaurantDescription(BaseModel):
     short_description: str
 
 
+class RestaurantDescriptionBatch(BaseModel):
+    restaurants: List[RestaurantDescription]
+
+
 class RestaurantsFinalized(BaseModel):
     begin_description: str
     restaurants: List[RestaurantDescription]
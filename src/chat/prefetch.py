@@ -0,0 +1,95 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from loguru import logger as log
+
+from src.chat.client import embedding_service, qdrant_client_location
+from src.helper.utils import detect_city
+from src.helper.vars import PREFETCH_AGREEMENT, PREFETCH_LIMIT, PREFETCH_SCORE_THRESHOLD, PREFETCH_WORKERS
+
+
+@dataclass
+class SpeculativeSearch:
+    """Broad vector search on the raw user message, started before the agent decides to call the ranking tool."""
+
+    message: str
+    city: str
+    future: Future
+
+
+# -- In-flight speculative searches, keyed by Chainlit session id. At most one per session (the current turn) --
+_speculative_searches: Dict[str, SpeculativeSearch] = {}
+_speculative_lock = threading.Lock()
+prefetch_executor = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="prefetch")
+
+
+def start_speculative_search(session_id: Optional[str], message: str) -> None:
+    """
+    Start embedding `message` and searching the candidates in the background, while the agent LLM call is in flight.
+    The search is filtered on the city named in the message (if any) and uses a lower score threshold than the
+    ranking tool, so the tool can narrow it down for its own threshold and city.
+    """
+    if not session_id or not message.strip():
+        return
+
+    city, search_kwargs = get_speculative_search_kwargs(message)
+    future = prefetch_executor.submit(lambda: qdrant_client_location.search_restaurants(**search_kwargs))
+    with _speculative_lock:
+        previous = _speculative_searches.pop(session_id, None)
+        _speculative_searches[session_id] = SpeculativeSearch(message=message, city=city, future=future)
+    if previous is not None:
+        previous.future.cancel()
+
+
+def get_speculative_search_kwargs(message: str) -> Tuple[str, dict]:
+    """City named in `message` and the `search_restaurants` arguments of its speculative search."""
+    city = detect_city(message)
+    search_kwargs = {"natural_query": message, "limit": PREFETCH_LIMIT, "score_threshold": PREFETCH_SCORE_THRESHOLD}
+    if city != "Whatever":
+        search_kwargs["city"] = city
+    return city, search_kwargs
+
+
+def cancel_speculative_search(session_id: Optional[str]) -> None:
+    """Drop the speculative search of a session, e.g. at the end of a turn that did not call the ranking tool."""
+    with _speculative_lock:
+        search = _speculative_searches.pop(session_id, None) if session_id else None
+    if search is not None and search.future.cancel():
+        log.info("Cancelled the speculative search before it started.")
+
+
+def take_speculative_search(session_id: Optional[str], query: str, city_filter: str) -> Optional[pd.DataFrame]:
+    """
+    Claim the speculative search results of a session for the ranking tool arguments.
+    They are reused only if the tool query embeds close to the raw message and the prefetch covers `city_filter`,
+    otherwise the search is cancelled and None is returned (the tool then searches itself).
+    """
+    with _speculative_lock:
+        search = _speculative_searches.pop(session_id, None) if session_id else None
+    if search is None:
+        return None
+
+    if search.city != "Whatever" and search.city != city_filter:
+        search.future.cancel()
+        return None
+
+    embeddings = np.asarray(list(embedding_service.embed([query, search.message])))
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    similarity = float(embeddings[0] @ embeddings[1])
+    if similarity < PREFETCH_AGREEMENT:
+        search.future.cancel()
+        log.info(f"Speculative search discarded (similarity {similarity:.3f}): '{query}' vs '{search.message}'")
+        return None
+
+    try:
+        results = search.future.result()
+    except Exception as e:
+        log.warning(f"Speculative search failed, searching again: {e}")
+        return None
+
+    log.info(f"Reusing the speculative search ({len(results)} candidates, similarity {similarity:.3f}) for: {query}")
+    return results
@@ -0,0 +1,51 @@
+import time
+from typing import Dict, List, Optional
+
+from loguru import logger as log
+
+from src.chat.client import qdrant_client_location
+from src.chat.prefetch import get_speculative_search_kwargs
+from src.chat.router import intent_router
+from src.chat.semantic_cache import semantic_response_cache
+from src.chat.tools import candidate_generation_and_ranking
+from src.helper.vars import DEFAULT_USER_PREFERENCES, PREWARM_QUERIES, STARTER_MESSAGES
+
+
+def prewarm_caches(messages: Optional[List[str]] = None, preferences: Optional[Dict] = None) -> float:
+    """
+    Run the starters and popular queries through the same steps as a user message, so the first click on a starter
+    finds every cache warm:
+    1. Message embedding (embedding service and semantic cache lookup)
+    2. Speculative search on the raw message (search cache)
+    3. Router, then the ranking tool for the messages it routes (search of the tool query and ranking caches)
+    Messages the router leaves to the agent get no ranking: their tool query is only known after the LLM call.
+
+    Args:
+        messages (Optional[List[str]]): Messages to pre-warm. Defaults to STARTER_MESSAGES and PREWARM_QUERIES.
+        preferences (Optional[Dict]): Preference profile of the rankings. Defaults to DEFAULT_USER_PREFERENCES.
+
+    Returns:
+        float: Seconds taken.
+    """
+    messages = messages if messages is not None else [*STARTER_MESSAGES, *PREWARM_QUERIES]
+    preferences = preferences or DEFAULT_USER_PREFERENCES
+    started_at = time.perf_counter()
+    ranked = 0
+
+    for message in messages:
+        try:
+            semantic_response_cache.get(message, preferences)
+            _, search_kwargs = get_speculative_search_kwargs(message)
+            qdrant_client_location.search_restaurants(**search_kwargs)
+
+            arguments = intent_router.route(message)
+            if arguments is None:
+                continue
+            candidate_generation_and_ranking(**arguments, kwargs_dict={"user_preferences": dict(preferences)})
+            ranked += 1
+        except Exception as e:
+            log.warning(f"Error pre-warming the caches for '{message}': {e}")
+
+    elapsed = time.perf_counter() - started_at
+    log.success(f"Pre-warmed {len(messages)} queries ({ranked} ranked) in {elapsed:.2f} s")
+    return elapsed
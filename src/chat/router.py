@@ -0,0 +1,127 @@
+import re
+import threading
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+import numpy as np
+import unidecode
+from loguru import logger as log
+
+from src.chat.client import embedding_service
+from src.feature_store.factory import get_feature_store
+from src.helper.utils import detect_city
+from src.helper.vars import ROUTER_MAX_QUERY_WORDS, ROUTER_THRESHOLD, STARTER_MESSAGES
+
+# -- Requests the fast path is meant for: a dish or cuisine, a few adjectives and a city --
+KNOWN_INTENTS = [
+    *STARTER_MESSAGES,
+    "I want to eat pho in Ha Noi",
+    "Find me a cheap BBQ restaurant in Ho Chi Minh City",
+    "Recommend a good sushi place in Saigon",
+    "Where can I get delicious bun cha in Hanoi?",
+    "Looking for authentic Vietnamese street food in Ho Chi Minh",
+    "Suggest a romantic French restaurant in Hanoi",
+    "Best Korean BBQ in Ho Chi Minh City",
+    "affordable seafood in Ha Noi",
+]
+# -- Messages with these words depend on the conversation or need reasoning, they always go to the agent --
+AGENT_ONLY_WORDS = set(
+    (
+        "not no without except but instead other another more less same again previous last first second third which compare than near nearby "
+        "never nor dont doesnt didnt isnt arent cant wont"
+    ).split()
+)
+# -- Negations the tokenizer would split ("don't" -> "don" + "t") or inflect ("avoiding", "hates"), matched before tokenizing --
+AGENT_ONLY_PATTERN = re.compile(r"n't\b|\b(avoid|hate|dislike)")
+# -- Speech words removed from the message to get the tool query ("only the key information") --
+SPEECH_WORDS = set(
+    (
+        "i we my me want wanna would like love really to eat have try find get give show recommend suggest looking look "
+        "for some any a an the at in on of please that is are and with where can could place places restaurant "
+        "restaurants spot spots city vietnam ho chi minh hcm hcmc sai gon saigon ha noi hanoi"
+    ).split()
+)
+# -- Dishes that are not cuisine names of the feature store --
+DISH_WORDS = set(
+    (
+        "pho bun cha bo banh mi xeo com tam hue bbq barbecue grill hotpot lau sushi ramen dimsum dim sum pizza pasta "
+        "steak burger noodles noodle dumplings seafood vegan vegetarian coffee cafe dessert bakery brunch buffet tapas "
+        "curry"
+    ).split()
+)
+
+
+@lru_cache(maxsize=1)
+def get_food_words() -> Set[str]:
+    """Cuisine words of the feature store (e.g. 'korean', 'fusion') and common dishes."""
+    cuisines = get_feature_store().read_all(columns=["cuisine_list"])["cuisine_list"].dropna()
+    cuisine_words = {word for cuisine_list in cuisines for word in re.findall(r"[a-z]+", unidecode.unidecode(cuisine_list).lower())}
+    return (cuisine_words - SPEECH_WORDS) | DISH_WORDS
+
+
+class IntentRouter:
+    """
+    Local router for the simple "dish/cuisine + adjectives + city" requests, which the agent would always
+    answer with a `candidate_generation_and_ranking` call. It builds the tool arguments itself when the rules
+    match and the message embeds close to a known intent, so the agent skips one LLM round trip.
+    """
+
+    def __init__(
+        self,
+        embed: Callable[[List[str]], Iterable[np.ndarray]],
+        known_intents: List[str] = KNOWN_INTENTS,
+        threshold: float = ROUTER_THRESHOLD,
+    ):
+        """
+        Initialize the IntentRouter.
+
+        Args:
+            embed (Callable): Embedding function of the messages (the shared embedding service).
+            known_intents (List[str]): Example requests of the fast path.
+            threshold (float): Minimum cosine similarity to the closest known intent.
+        """
+        self.embed = embed
+        self.known_intents = known_intents
+        self.threshold = threshold
+        self._intent_embeddings: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    def route(self, message: str) -> Optional[Dict[str, str]]:
+        """
+        Returns the `candidate_generation_and_ranking` arguments for `message`, or None to let the agent decide.
+        """
+        text = unidecode.unidecode(message).lower()
+        if AGENT_ONLY_PATTERN.search(text):
+            return None
+
+        words = re.findall(r"[a-z0-9]+", text)
+        city = detect_city(message)
+        if city == "Whatever" or AGENT_ONLY_WORDS.intersection(words):
+            return None
+
+        query_words = [word for word in words if word not in SPEECH_WORDS]
+        if not 0 < len(query_words) <= ROUTER_MAX_QUERY_WORDS or not get_food_words().intersection(query_words):
+            return None
+
+        similarity = float(np.max(self._get_intent_embeddings() @ self._normalize(list(self.embed([message]))[0])))
+        if similarity < self.threshold:
+            return None
+
+        arguments = {"english_natural_query": " ".join(query_words), "city_filter": city}
+        log.info(f"Routed to candidate_generation_and_ranking (similarity {similarity:.3f}): {arguments}")
+        return arguments
+
+    def _get_intent_embeddings(self) -> np.ndarray:
+        if self._intent_embeddings is None:
+            with self._lock:
+                if self._intent_embeddings is None:
+                    self._intent_embeddings = np.stack([self._normalize(vector) for vector in self.embed(self.known_intents)])
+        return self._intent_embeddings
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+
+intent_router = IntentRouter(embed=embedding_service.embed)
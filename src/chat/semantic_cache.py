@@ -0,0 +1,147 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from llama_index.core.tools import ToolOutput
+from loguru import logger as log
+
+from src.chat.client import embedding_service
+from src.helper.cache import LRUCache
+from src.helper.utils import detect_city
+from src.helper.vars import (
+    ENRICH_TOOL_NAME,
+    ENRICH_UNAVAILABLE_MESSAGE,
+    PREFERENCE_QUANTUM,
+    RANKING_TOOL_NAME,
+    SEMANTIC_CACHE_QUERY_AGREEMENT,
+    SEMANTIC_CACHE_SIZE,
+    SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_TTL,
+)
+
+# -- (city, quantized preferences): only answers computed for the same city and preferences are comparable --
+Partition = Tuple[str, Tuple]
+
+
+def quantize_preferences(preferences: Optional[Dict], quantum: float = PREFERENCE_QUANTUM) -> Tuple:
+    """Round the preference weights to `quantum` so that small slider moves share the cached answers."""
+    preferences = preferences or {}
+    scores = tuple(
+        (key, round(round(float(value) / quantum) * quantum, 4))
+        for key, value in sorted(preferences.items())
+        if str(key).endswith("_score") and isinstance(value, (int, float))
+    )
+    distance = (
+        bool(preferences.get("distance_preference", False)),
+        preferences.get("distance_km") if preferences.get("distance_preference") else None,
+    )
+    return scores + (distance,)
+
+
+class SemanticResponseCache:
+    """
+    Process-wide cache of the recommendation answers, looked up by similarity of the user message embedding.
+    Entries are partitioned by (city named in the message, quantized preferences), expire after `ttl`
+    and are evicted least recently used first. The index is a plain matrix scan, it only holds `maxsize` vectors.
+    """
+
+    def __init__(
+        self,
+        embed: Callable[[List[str]], Iterable[np.ndarray]],
+        maxsize: int = SEMANTIC_CACHE_SIZE,
+        ttl: Optional[float] = SEMANTIC_CACHE_TTL,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+    ):
+        """
+        Initialize the SemanticResponseCache.
+
+        Args:
+            embed (Callable): Embedding function of the messages (the shared embedding service).
+            maxsize (int): Maximum number of cached answers.
+            ttl (Optional[float]): Seconds an answer stays valid. None means no expiry.
+            threshold (float): Minimum cosine similarity between two messages to reuse an answer.
+        """
+        self.embed = embed
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.threshold = threshold
+        self._entries: "OrderedDict[str, Tuple[Partition, np.ndarray, Optional[float], str]]" = OrderedDict()
+        self._embeddings = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+
+    def get(self, message: str, preferences: Optional[Dict]) -> Optional[str]:
+        """Return the cached answer of the most similar message above the threshold, None on a miss."""
+        partition = (detect_city(message), quantize_preferences(preferences))
+        embedding = self._embed(message)
+        now = time.monotonic()
+
+        with self._lock:
+            for entry_id in [_id for _id, (_, _, expires_at, _) in self._entries.items() if expires_at is not None and expires_at <= now]:
+                del self._entries[entry_id]
+
+            candidates = [(entry_id, entry) for entry_id, entry in self._entries.items() if entry[0] == partition]
+            if not candidates:
+                return None
+
+            similarities = np.stack([entry[1] for _, entry in candidates]) @ embedding
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                return None
+
+            entry_id, (_, _, _, response) = candidates[best]
+            self._entries.move_to_end(entry_id)
+
+        log.info(f"Semantic cache hit (similarity {similarities[best]:.3f}) for: {message}")
+        return response
+
+    def put(self, message: str, preferences: Optional[Dict], response: str, sources: Sequence[ToolOutput]) -> bool:
+        """
+        Cache the answer of `message` if it is a recommendation the message alone determines:
+        the turn ended with the enrichment tool, the ranking ran for the city named in the message,
+        and its query agrees with the message (so it did not come from the earlier conversation).
+
+        Returns:
+            bool: Whether the answer was cached.
+        """
+        ranking_calls = [source for source in sources if source.tool_name == RANKING_TOOL_NAME and not source.is_error]
+        if not sources or sources[-1].tool_name != ENRICH_TOOL_NAME or sources[-1].is_error or not ranking_calls:
+            return False
+        if ENRICH_UNAVAILABLE_MESSAGE in response:
+            return False
+
+        ranking_kwargs = (ranking_calls[-1].raw_input or {}).get("kwargs", {})
+        city = detect_city(message)
+        if ranking_kwargs.get("city_filter", "Whatever") != city:
+            return False
+
+        embedding = self._embed(message)
+        ranking_query = ranking_kwargs.get("english_natural_query", "")
+        if not ranking_query or float(self._embed(ranking_query) @ embedding) < SEMANTIC_CACHE_QUERY_AGREEMENT:
+            return False
+
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[uuid.uuid4().hex] = ((city, quantize_preferences(preferences)), embedding, expires_at, response)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _embed(self, text: str) -> np.ndarray:
+        """Normalized embedding of `text`, memoized since a message is embedded on lookup and again on store."""
+        embedding = self._embeddings.get(text)
+        if embedding is None:
+            embedding = np.asarray(list(self.embed([text]))[0], dtype=np.float32)
+            embedding /= np.linalg.norm(embedding) or 1.0
+            self._embeddings.set(text, embedding)
+        return embedding
+
+
+semantic_response_cache = SemanticResponseCache(embed=embedding_service.embed)
@@ -0,0 +1,51 @@
+import asyncio
+from typing import AsyncIterator, Dict, Optional
+
+import chainlit as cl
+
+
+class TokenStream:
+    """
+    Ordered bridge between the agent worker thread, which produces tokens as the LLM streams them,
+    and the event loop, which forwards them to the Chainlit message.
+    """
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self._loop = loop or asyncio.get_running_loop()
+        self._queue: asyncio.Queue = asyncio.Queue()
+
+    def put(self, token: str) -> None:
+        """Queue a token. Safe to call from any thread."""
+        if token:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, token)
+
+    def close(self) -> None:
+        """Signal the end of the stream. Safe to call from any thread."""
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, None)
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        while (token := await self._queue.get()) is not None:
+            yield token
+
+
+# -- Token streams of the sessions with a turn in flight, keyed by Chainlit session id --
+_token_streams: Dict[str, TokenStream] = {}
+
+
+def register_token_stream(session_id: str, token_stream: TokenStream) -> None:
+    _token_streams[session_id] = token_stream
+
+
+def unregister_token_stream(session_id: str) -> None:
+    _token_streams.pop(session_id, None)
+
+
+def get_token_stream(session_id: Optional[str]) -> Optional[TokenStream]:
+    """Returns the token stream of a session, or None when the turn is not streamed (e.g. outside Chainlit)."""
+    return _token_streams.get(session_id) if session_id else None
+
+
+async def forward_token_stream(token_stream: TokenStream, msg: cl.Message) -> None:
+    """Forward every token of `token_stream` to `msg` until the stream is closed."""
+    async for token in token_stream:
+        await msg.stream_token(token)
@@ -1,41 +1,71 @@
-import os
-from typing import Annotated, Any, Dict, List, Literal
+import asyncio
+from typing import Annotated, Any, Dict, List, Literal, Optional
 
-import pandas as pd
 import unidecode
+from jiter import from_json
 from llama_index.core.tools import FunctionTool
 from loguru import logger as log
-from tabulate import tabulate
 
-from src.chat.client import bigquery_client, core_llm_model
+from src.chat.cache import candidate_payload_cache, restaurant_description_cache
+from src.chat.client import async_core_llm_model
+from src.chat.encoding import CandidateRanking
 from src.chat.models import RestaurantsFinalized
-from src.chat.prompt import ENRICH_PROMPT
-from src.helper.utils import encode_url, get_feature_storage_mode
-from src.helper.vars import COSINE_THRESHOLD, OPENAI_MODEL, TOP_K
-from src.ranker.workflow import build_mcdm_workflow
+from src.chat.prefetch import take_speculative_search
+from src.chat.prompt import ENRICH_CONTEXT, ENRICH_PROMPT
+from src.chat.streaming import get_token_stream
+from src.chat.usage import record_usage
+from src.chat.utils import run_coroutine_sync
+from src.feature_store.factory import get_feature_store
+from src.helper.utils import encode_url, normalize_query
+from src.helper.vars import COSINE_THRESHOLD, DESCRIPTION_COLUMN, ENRICH_UNAVAILABLE_MESSAGE, LOCATION_DETAIL_COLUMNS, OPENAI_MODEL, TOP_K
 
 
 def candidate_generation_and_ranking(
     english_natural_query: str,
     city_filter: Literal["Ha Noi", "Ho Chi Minh", "Whatever"] = "Whatever",
     kwargs_dict: Dict[str, Any] = None,
-) -> pd.DataFrame:
+) -> CandidateRanking:
     """
     Retrieves the restaurants that match the user's query.
     The english_natural_query should be a short and concise information containing only the key information (remove speech words or noise, verbs, etc).
     If key information is missing (e.g., city), prompt the user for clarification about location preference, like at Ha Noi or Ho Chi Minh City, etc.
     """
+    # -- The ranker (numba, scipy) is imported with the first ranking (or the boot warm-up), not with the app --
+    from src.ranker.workflow import build_mcdm_workflow
+
     cosine_threshold: float = COSINE_THRESHOLD
     top_k: int = TOP_K
     decoded_query = unidecode.unidecode(english_natural_query)
+    search_results = take_speculative_search((kwargs_dict or {}).get("session_id"), decoded_query, city_filter)
 
-    location_top_k = build_mcdm_workflow(top_k, city_filter, cosine_threshold, decoded_query, kwargs_dict)
+    location_top_k, candidate_payloads = build_mcdm_workflow(top_k, city_filter, cosine_threshold, decoded_query, kwargs_dict, search_results)
 
     if len(location_top_k) < top_k:
         cosine_threshold -= 0.05
-        location_top_k = build_mcdm_workflow(top_k, city_filter, cosine_threshold, decoded_query, kwargs_dict)
+        location_top_k, candidate_payloads = build_mcdm_workflow(top_k, city_filter, cosine_threshold, decoded_query, kwargs_dict, search_results)
+
+    candidate_payload_cache.put((kwargs_dict or {}).get("session_id"), candidate_payloads, query=normalize_query(decoded_query))
+
+    return CandidateRanking.from_dataframe(location_top_k)
+
+
+def fetch_location_details(locations: List[str], session_id: str = None) -> List[Dict[str, Any]]:
+    """
+    Get the details of the recommended restaurants, in the given order.
+    Payloads cached by the ranking tool for this session are used as-is, only the missing restaurants
+    (or columns) are fetched from the feature store.
+    """
+    location_ids = [int(loc) for loc in locations]
+    cached = candidate_payload_cache.get_many(session_id, location_ids)
+    incomplete_ids = [_id for _id in location_ids if any(col not in cached.get(_id, {}) for col in LOCATION_DETAIL_COLUMNS)]
+
+    if incomplete_ids:
+        for record in get_feature_store().fetch_by_ids(incomplete_ids, columns=LOCATION_DETAIL_COLUMNS):
+            _id = int(record["location_id"])
+            cached[_id] = {**record, **cached.get(_id, {})}
 
-    return tabulate(location_top_k, headers="keys", tablefmt="github")
+    log.info(f"Fetched {len(cached)} restaurant details, {len(incomplete_ids)} from the feature store.")
+    return [cached[_id] for _id in location_ids if _id in cached]
 
 
 def enrich_restaurant_recommendations(
@@ -48,24 +78,20 @@ def enrich_restaurant_recommendations(
     TRUST the previous function, but you can exclude some locations if they are too out of context, acceptable if it's partially relevant.
     ONLY use this function at the end of the pipeline.
     """
-    feature_storage_mode = get_feature_storage_mode()
-    if feature_storage_mode == "remote":
-        query = f"""
-        SELECT location_text_nlp, location_id, location_name, address, location_map, location_url, image_url, cuisine_list, price_range, location_overall_rate
-        FROM `tripadvisor-recommendations.fs_tripadvisor.fs_location`
-        WHERE location_id IN ({", ".join(map(str, locations))})
-        """
-
-        query_result = bigquery_client.fetch_bigquery_as_list(query)
-    elif feature_storage_mode == "local":
-        project_root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-        data_path = os.path.join(project_root, "include", "data", "fs_location.parquet")
-        query_result = pd.read_parquet(data_path, engine="pyarrow")
-        log.success(f"Loaded {len(query_result)} records from local storage.")
-        query_result = query_result[query_result["location_id"].isin([int(loc) for loc in locations])].to_dict("records")
-        log.info(f"Filtered records to {len(query_result)} based on provided location IDs.")
-    else:
-        return "Please contact deve`loper to fix the feature storage mode."
+    return run_coroutine_sync(aenrich_restaurant_recommendations(original_user_message, locations, kwargs_dict))
+
+
+async def aenrich_restaurant_recommendations(
+    original_user_message: str,
+    locations: List[str],
+    kwargs_dict: Dict[str, Any] = None,
+) -> str:
+    """
+    Async implementation of `enrich_restaurant_recommendations`, on the async OpenAI client.
+    Short descriptions are cached per restaurant and query intent, only the restaurants missing from the cache are sent to the LLM.
+    """
+    session_id = (kwargs_dict or {}).get("session_id")
+    query_result = await asyncio.to_thread(fetch_location_details, locations, session_id)
 
     if not query_result:
         return "No restaurant recommendations found. Please try again with a different query."
@@ -73,44 +99,67 @@ def enrich_restaurant_recommendations(
         check_valid_value = lambda x: (True if x is not None and str(x).strip() not in ["", "-1"] else False)
         query_result = [{k: v for k, v in loc.items() if check_valid_value(v)} for loc in query_result]
 
-    context_data = [f"user_query: {original_user_message}"]
-    context_data.extend(
-        [
-            str(
-                {
-                    "location_id": loc.get("location_id", ""),
-                    "description": loc.get("short_description", ""),
-                }
-            )
-            for loc in query_result
-            if not str(loc.get("short_description")).strip().isspace()
-        ]
-    )
+    # -- Intent of a restaurant: the ranking query that retrieved it, else the user message
+    location_ids = [int(loc["location_id"]) for loc in query_result]
+    ranking_queries = candidate_payload_cache.get_queries(session_id, location_ids)
+    intents = {_id: ranking_queries.get(_id) or normalize_query(original_user_message) for _id in location_ids}
+    cached_descriptions = restaurant_description_cache.get_many(intents)
+    log.info(f"Restaurant description cache: {len(cached_descriptions)} hits, {len(location_ids) - len(cached_descriptions)} misses.")
 
-    llm_params = {
-        "messages": [
+    # -- Restaurants first, the user query (the most variable part) last
+    context_data = [
+        str(
             {
-                "role": "developer",
-                "content": ENRICH_PROMPT.format(context_data="\n\n".join(context_data)),
+                "location_id": loc.get("location_id", ""),
+                "description": loc.get(DESCRIPTION_COLUMN, ""),
             }
+        )
+        for loc in query_result
+        if not str(loc.get(DESCRIPTION_COLUMN)).strip().isspace() and int(loc["location_id"]) not in cached_descriptions
+    ]
+    context_data.append(f"user_query: {original_user_message}")
+
+    # -- Static instructions first, so the provider prompt cache can serve them
+    llm_params = {
+        "messages": [
+            {"role": "developer", "content": ENRICH_PROMPT},
+            {"role": "user", "content": ENRICH_CONTEXT.format(context_data="\n\n".join(context_data))},
         ],
         "model": OPENAI_MODEL,
         "temperature": 0.15,
         "top_p": 0.9,
         "response_format": RestaurantsFinalized,
+        "stream_options": {"include_usage": True},
     }
 
+    unable_response = RestaurantsFinalized(
+        begin_description="",
+        restaurants=[],
+        end_description_with_follow_up=ENRICH_UNAVAILABLE_MESSAGE,
+    ).model_dump()
+    known_descriptions = {str(_id): description for _id, description in cached_descriptions.items()}
+    token_stream = get_token_stream(session_id)
+    streamed_output = ""
+
     try:
-        completion = core_llm_model.beta.chat.completions.parse(**llm_params)
-        unable_response = RestaurantsFinalized(
-            begin_description="",
-            restaurants=[],
-            end_description_with_follow_up="Unable to generate recommendations at this time.",
-        ).model_dump()
+        async with async_core_llm_model.beta.chat.completions.stream(**llm_params) as stream:
+            async for event in stream:
+                if token_stream is None or event.type != "content.delta":
+                    continue
+                # -- Forward the newly settled part of the rendered answer while the JSON is still being generated
+                partial_description = from_json(event.snapshot.encode("utf-8"), partial_mode="trailing-strings")
+                partial_output = render_partial_recommendations(partial_description, query_result, known_descriptions)
+                if partial_output.startswith(streamed_output) and len(partial_output) > len(streamed_output):
+                    token_stream.put(partial_output[len(streamed_output) :])
+                    streamed_output = partial_output
+            completion = await stream.get_final_completion()
+        record_usage("enrich", completion.usage, session_id)
 
         if completion.choices[0].message.parsed:
             restaurant_parsed = completion.choices[0].message.parsed  # type: RestaurantsFinalized
             restaurant_description = restaurant_parsed.model_dump()
+            generated_descriptions = {int(item["location_id"]): item["short_description"] for item in restaurant_description["restaurants"]}
+            restaurant_description_cache.put_many(generated_descriptions, intents)
         elif completion.choices[0].message.refusal:
             restaurant_description = unable_response
         else:
@@ -119,33 +168,88 @@ def enrich_restaurant_recommendations(
         log.error(f"An error occurred: {e}")
         restaurant_description = unable_response
 
-    short_desc_map = {str(item["location_id"]): item["short_description"] for item in restaurant_description.get("restaurants", [])}
+    restaurant_output = render_recommendations(restaurant_description, query_result, known_descriptions)
+    if token_stream is not None and restaurant_output.startswith(streamed_output):
+        token_stream.put(restaurant_output[len(streamed_output) :])
+
+    return restaurant_output
+
+
+def render_location_card(loc: Dict[str, Any], short_description: str = "") -> str:
+    """Render the markdown card of a recommended restaurant: the query-specific description, then the precomputed one."""
+    return (
+        f"### **{loc.get('location_name', '')}**\n"
+        + (f"{short_description}\n\n" if short_description else "")
+        + (f"{loc.get(DESCRIPTION_COLUMN)}\n\n" if loc.get(DESCRIPTION_COLUMN) else "")
+        + "".join(
+            [
+                (f"- 📍 {loc.get('address', '')}\n" if "address" in loc else ""),
+                (f"- ⭐️ {loc.get('location_overall_rate')}\n" if "location_overall_rate" in loc else ""),
+                (f"- 💰 Price: {loc.get('price_range')}\n" if "price_range" in loc and loc.get("price_range") != "Not Defined" else ""),
+                (f"- [🗺️ Google Maps]({encode_url(loc.get('location_map', ''))})\n" if "location_map" in loc else ""),
+                (f"- [🌐 Restaurant Website]({encode_url(loc.get('location_url', ''))})\n" if "location_url" in loc else ""),
+                (f"![{loc.get('location_name', '')}]({loc.get('image_url', '')}?w=500&h=300&s=1)\n" if "image_url" in loc else ""),
+            ]
+        )
+    )
+
+
+def render_recommendations(
+    restaurant_description: Dict[str, Any],
+    query_result: List[Dict[str, Any]],
+    known_descriptions: Optional[Dict[str, str]] = None,
+) -> str:
+    """
+    Render the final markdown answer from the structured LLM output and the restaurant details.
+    `known_descriptions` ({location_id: short_description}, e.g. cached ones) take precedence over the LLM output.
+    """
+    short_desc_map = {
+        **{str(item["location_id"]): item["short_description"] for item in restaurant_description.get("restaurants", [])},
+        **(known_descriptions or {}),
+    }
 
-    restaurant_output = "\n".join(
+    return "\n".join(
         [
             f"{restaurant_description['begin_description']}\n\n---\n",
-            "\n".join(
-                [
-                    f"### **{loc.get('location_name', '')}**\n"
-                    + (f"{short_desc_map.get(str(loc.get('location_id')), '')}\n\n" if short_desc_map.get(str(loc.get("location_id"))) else "")
-                    + "".join(
-                        [
-                            (f"- 📍 {loc.get('address', '')}\n" if "address" in loc else ""),
-                            (f"- ⭐️ {loc.get('location_overall_rate')}\n" if "location_overall_rate" in loc else ""),
-                            (f"- 💰 Price: {loc.get('price_range')}\n" if "price_range" in loc and loc.get("price_range") != "Not Defined" else ""),
-                            (f"- [🗺️ Google Maps]({encode_url(loc.get('location_map', ''))})\n" if "location_map" in loc else ""),
-                            (f"- [🌐 Restaurant Website]({encode_url(loc.get('location_url', ''))})\n" if "location_url" in loc else ""),
-                            (f"![{loc.get('location_name', '')}]({loc.get('image_url', '')}?w=500&h=300&s=1)\n" if "image_url" in loc else ""),
-                        ]
-                    )
-                    for loc in query_result
-                ]
-            ),
+            "\n".join([render_location_card(loc, short_desc_map.get(str(loc.get("location_id")), "")) for loc in query_result]),
             f"---\n{restaurant_description['end_description_with_follow_up']}\n",
         ]
     )
 
-    return restaurant_output
+
+def render_partial_recommendations(
+    partial_description: Dict[str, Any],
+    query_result: List[Dict[str, Any]],
+    known_descriptions: Optional[Dict[str, str]] = None,
+) -> str:
+    """
+    Render the part of the final answer that is already settled by a partially generated RestaurantsFinalized.
+    The result is always a prefix of `render_recommendations` on the complete output, so it can be streamed.
+    """
+    begin_description = partial_description.get("begin_description", "")
+    if "restaurants" not in partial_description:
+        return begin_description
+
+    output = f"{begin_description}\n\n---\n\n"
+    restaurants = partial_description.get("restaurants") or []
+    is_finished = "end_description_with_follow_up" in partial_description
+    in_progress = restaurants[-1] if restaurants and not is_finished else {}
+    short_desc_map = {
+        **{str(item.get("location_id")): item.get("short_description", "") for item in (restaurants if is_finished else restaurants[:-1])},
+        **(known_descriptions or {}),
+    }
+
+    cards = []
+    for loc in query_result:
+        location_id = str(loc.get("location_id"))
+        if location_id in short_desc_map or is_finished:
+            cards.append(render_location_card(loc, short_desc_map.get(location_id, "")))
+        elif str(in_progress.get("location_id")) == location_id:
+            return output + "\n".join(cards + [f"### **{loc.get('location_name', '')}**\n{in_progress.get('short_description', '')}"])
+        else:
+            return output + "\n".join(cards)
+
+    return output + "\n".join(cards) + f"\n---\n{partial_description.get('end_description_with_follow_up', '')}"
 
 
 candidate_generation_and_ranking_tool = FunctionTool.from_defaults(
@@ -154,5 +258,6 @@ candidate_generation_and_ranking_tool = FunctionTool.from_defaults(
 )
 enrich_restaurant_recommendations_tool = FunctionTool.from_defaults(
     fn=enrich_restaurant_recommendations,
+    async_fn=aenrich_restaurant_recommendations,
     return_direct=True,
 )
@@ -0,0 +1,90 @@
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from loguru import logger as log
+
+from src.helper.cache import LRUCache
+from src.helper.vars import SESSION_CACHE_SIZE, SESSION_CACHE_TTL
+
+
+@dataclass
+class TokenUsage:
+    """Token counts of one or more OpenAI calls. `cached_tokens` is the part of `prompt_tokens` served from the prompt cache."""
+
+    calls: int = 0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    completion_tokens: int = 0
+
+    @classmethod
+    def from_openai(cls, usage: Any) -> "TokenUsage":
+        """Build from the `usage` of an OpenAI chat completion (or of its last stream chunk)."""
+        details = getattr(usage, "prompt_tokens_details", None)
+        return cls(
+            calls=1,
+            prompt_tokens=usage.prompt_tokens or 0,
+            cached_tokens=(getattr(details, "cached_tokens", None) or 0) if details else 0,
+            completion_tokens=usage.completion_tokens or 0,
+        )
+
+    @property
+    def cached_ratio(self) -> float:
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+    def add(self, other: "TokenUsage") -> None:
+        self.calls += other.calls
+        self.prompt_tokens += other.prompt_tokens
+        self.cached_tokens += other.cached_tokens
+        self.completion_tokens += other.completion_tokens
+
+    def __str__(self) -> str:
+        return (
+            f"{self.calls} calls, prompt {self.prompt_tokens} (cached {self.cached_tokens}, {self.cached_ratio:.0%}), "
+            f"completion {self.completion_tokens}"
+        )
+
+
+# -- Per session: {source (agent, enrich, ...): TokenUsage} --
+_session_usage = LRUCache(maxsize=SESSION_CACHE_SIZE, ttl=SESSION_CACHE_TTL)
+_usage_lock = threading.Lock()
+
+
+def record_usage(source: str, usage: Any, session_id: Optional[str] = None) -> None:
+    """
+    Log the token usage of an OpenAI call and add it to the totals of the session (if any).
+
+    Args:
+        source (str): Name of the call site, e.g. 'agent' or 'enrich'.
+        usage (Any): `usage` of the OpenAI response. None (e.g. a stream without usage) is ignored.
+        session_id (Optional[str]): Chainlit session id.
+    """
+    if usage is None:
+        return
+
+    call_usage = TokenUsage.from_openai(usage)
+    log.info(f"[{source}] tokens: {call_usage}")
+    if not session_id:
+        return
+
+    with _usage_lock:
+        totals: Dict[str, TokenUsage] = _session_usage.get(session_id) or {}
+        totals.setdefault(source, TokenUsage()).add(call_usage)
+        _session_usage.set(session_id, totals)
+
+
+def get_session_usage(session_id: Optional[str]) -> Dict[str, TokenUsage]:
+    """Token usage of a session per source, plus the overall 'total'."""
+    with _usage_lock:
+        totals = {source: TokenUsage(**vars(usage)) for source, usage in (_session_usage.get(session_id) or {}).items()} if session_id else {}
+
+    overall = TokenUsage()
+    for usage in totals.values():
+        overall.add(usage)
+    return {**totals, "total": overall}
+
+
+def log_session_usage(session_id: Optional[str]) -> None:
+    """Log the token usage of a session, e.g. when the chat ends."""
+    for source, usage in get_session_usage(session_id).items():
+        log.info(f"Session {session_id} [{source}] tokens: {usage}")
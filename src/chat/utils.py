@@ -1,13 +1,17 @@
-import re
-import time
-from typing import Any, Dict, List
+import asyncio
+from typing import Any, Coroutine, Dict, List, Optional, TypeVar
 
+import chainlit as cl
+from chainlit.context import context_var
 from src.chat.client import async_core_llm_model
 from src.chat.models import NextResponse
-from src.chat.prompt import CONV_SUMMARY_PROMPT, RESPONSE_SUGGESTION_PROMPT
+from src.chat.prompt import CHAT_HISTORY_CONTEXT, CONV_SUMMARY_PROMPT, RESPONSE_SUGGESTION_PROMPT
+from src.chat.usage import record_usage
 
+T = TypeVar("T")
 
-async def generate_conv_summary(chat_history: List[Dict[str, str]]) -> str:
+
+async def generate_conv_summary(chat_history: List[Dict[str, str]], session_id: Optional[str] = None) -> str:
     """
     Generate a summary of the conversation messages using the async LLM model.
     This function formats the conversation messages into a string and sends it to the LLM model
@@ -15,10 +19,8 @@ async def generate_conv_summary(chat_history: List[Dict[str, str]]) -> str:
     """
     llm_params = {
         "messages": [
-            {
-                "role": "developer",
-                "content": CONV_SUMMARY_PROMPT.format(chat_history=chat_history),
-            }
+            {"role": "developer", "content": CONV_SUMMARY_PROMPT},
+            {"role": "user", "content": CHAT_HISTORY_CONTEXT.format(chat_history=chat_history)},
         ],
         "model": "gpt-4.1-nano",
         "max_tokens": 512,
@@ -27,11 +29,12 @@ async def generate_conv_summary(chat_history: List[Dict[str, str]]) -> str:
     }
 
     completion = await async_core_llm_model.chat.completions.create(**llm_params)
+    record_usage("conv_summary", completion.usage, session_id)
 
     return completion.choices[0].message.content
 
 
-async def generate_next_response(chat_history: List[Dict[str, str]]) -> NextResponse:
+async def generate_next_response(chat_history: List[Dict[str, str]], session_id: Optional[str] = None) -> NextResponse:
     """
     Generate a list of 3 suggested questions based on the chat history.
     This function formats the chat history into a string and sends it to the LLM model
@@ -39,10 +42,8 @@ async def generate_next_response(chat_history: List[Dict[str, str]]) -> NextResp
     """
     llm_params = {
         "messages": [
-            {
-                "role": "developer",
-                "content": RESPONSE_SUGGESTION_PROMPT.format(chat_history=chat_history),
-            }
+            {"role": "developer", "content": RESPONSE_SUGGESTION_PROMPT},
+            {"role": "user", "content": CHAT_HISTORY_CONTEXT.format(chat_history=chat_history)},
         ],
         "model": "gpt-4.1-nano",
         "max_tokens": 512,
@@ -52,6 +53,7 @@ async def generate_next_response(chat_history: List[Dict[str, str]]) -> NextResp
     }
 
     async_completion = await async_core_llm_model.beta.chat.completions.parse(**llm_params)
+    record_usage("next_response", async_completion.usage, session_id)
     unable_response = ["I'm not sure what to ask next. Can you help me?"]
     completion_response = unable_response
 
@@ -61,8 +63,15 @@ async def generate_next_response(chat_history: List[Dict[str, str]]) -> NextResp
     return NextResponse(**completion_response).model_dump()
 
 
-def generate_streaming_response(response: Any, delay: float = 0.05):
-    """Generator to mimic some LLM response with spaces and newlines preserved"""
-    for part in re.findall(r"\S+\s*", str(response)):
-        yield part
-        time.sleep(delay)
+def run_coroutine_sync(coro: Coroutine[Any, Any, T]) -> T:
+    """
+    Run a coroutine to completion from the synchronous agent worker thread.
+    Within a Chainlit session it runs on the app event loop, where the async OpenAI client lives,
+    otherwise (e.g. CLI jobs) in a fresh event loop.
+    """
+    try:
+        context_var.get()
+    except LookupError:
+        return asyncio.run(coro)
+
+    return cl.run_sync(coro)
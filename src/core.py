@@ -1,55 +1,86 @@
-import os
-from typing import Literal, Optional
+import asyncio
+import threading
+from collections import deque
+from functools import lru_cache
+from typing import Dict, List, Literal, Optional
 
-import yaml
+from llama_index.core.base.llms.types import ChatMessage, MessageRole
 from llama_index.core.callbacks import CallbackManager
-from llama_index.core.memory import ChatMemoryBuffer
 from llama_index.core.storage.chat_store import SimpleChatStore
+from loguru import logger as log
 
 import chainlit as cl
 import chainlit.input_widget as cliw
-from src.chat.agent import ParseParamsAgent
+from src.chat.agent import ParseParamsAgent, ParseParamsAgentWorker
 from src.chat.chainlit import ChainlitStatusCallback
 from src.chat.client import agent_llm_model
+from src.chat.memory import SummarizingChatMemory
+from src.chat.prompt import AGENT_SYSTEM_PROMPT
+from src.chat.router import intent_router
+from src.chat.semantic_cache import semantic_response_cache
 from src.chat.tools import candidate_generation_and_ranking_tool, enrich_restaurant_recommendations_tool
-from src.helper.utils import get_config_file, get_display_name, get_welcome_message
-from src.s3.client import S3Client
+from src.chat.utils import generate_conv_summary, generate_next_response
+from src.helper.utils import get_display_name, get_welcome_message
+from src.helper.vars import MEMORY_TOKEN_LIMIT, MESSAGE_HISTORY_CHAR_LIMIT, MESSAGE_HISTORY_LIMIT
+from src.s3.preferences import preference_store
+
+
+# -- Agent parts built once per process and shared by the agents of every session --
+@lru_cache(maxsize=None)
+def get_agent_callback_manager(callback: Optional[Literal["chainlit", "none"]] = "chainlit") -> Optional[CallbackManager]:
+    """
+    The Chainlit handler reads the session from the context of each event and counts the tokens of each LLM call
+    on its own, so one instance serves every session.
+    """
+    return CallbackManager([ChainlitStatusCallback()]) if callback == "chainlit" else None
+
+
+@lru_cache(maxsize=None)
+def get_agent_worker(verbose: bool = True, callback: Optional[Literal["chainlit", "none"]] = "chainlit") -> ParseParamsAgentWorker:
+    """The agent worker (tools, LLM, system prompt) keeps its per-chat state in the task, so it is shared by every session."""
+    callback_manager = get_agent_callback_manager(callback)
+    llm = agent_llm_model.get()
+    if callback_manager is not None:
+        llm.callback_manager = callback_manager
+
+    return ParseParamsAgentWorker.from_tools(
+        [
+            candidate_generation_and_ranking_tool,
+            enrich_restaurant_recommendations_tool,
+        ],
+        llm=llm,
+        verbose=verbose,
+        callback_manager=callback_manager,
+        prefix_messages=[ChatMessage(content=AGENT_SYSTEM_PROMPT, role=MessageRole.SYSTEM)],
+    )
 
 
 # -- Wrapper function to generate the foodbot agent --
 def generate_foodbot_agent(
-    chat_store_token_limit=4096,
+    chat_store_token_limit=MEMORY_TOKEN_LIMIT,
     verbose=True,
     callback: Optional[Literal["chainlit", "none"]] = "chainlit",
 ) -> ParseParamsAgent:
-    """Initialize the agent with tools and settings.
+    """Initialize the agent of a session: a new chat memory around the shared agent worker.
     Args:
-        chat_store_token_limit (int): The token limit for the chat memory.
+        chat_store_token_limit (int): The token budget of the chat memory (older tool outputs are summarized, then the oldest turns dropped).
         verbose (bool): Whether to enable verbose logging.
         callback (Optional[Literal[True, False]]): Whether to enable the Streamlit callback. Defaults to True.
     Returns:
         ParseParamsAgent: An instance of the ParseParamsAgent configured with the specified tools and settings.
     """
-    if callback == "chainlit":
-        callback_manager = CallbackManager([ChainlitStatusCallback()])
-    else:
-        callback_manager = None
-
-    chat_store = SimpleChatStore()
-    chat_memory = ChatMemoryBuffer.from_defaults(token_limit=chat_store_token_limit, chat_store=chat_store)
+    chat_memory = SummarizingChatMemory.from_defaults(token_limit=chat_store_token_limit, chat_store=SimpleChatStore())
 
     try:
-        agent_kwargs = {
-            "tools": [
-                candidate_generation_and_ranking_tool,
-                enrich_restaurant_recommendations_tool,
-            ],
-            "llm": agent_llm_model,
-            "memory": chat_memory,
-            "callback_manager": callback_manager,
-            "verbose": verbose,
-        }
-        return ParseParamsAgent.from_tools(**agent_kwargs)
+        return ParseParamsAgent(
+            agent_worker=get_agent_worker(verbose, callback),
+            memory=chat_memory,
+            llm=agent_llm_model.get(),
+            callback_manager=get_agent_callback_manager(callback),
+            verbose=verbose,
+            response_cache=semantic_response_cache,
+            router=intent_router,
+        )
     except Exception as e:
         raise RuntimeError(f"Failed to initialize agent: {str(e)}")
 
@@ -86,68 +117,167 @@ async def remove_next_response_actions():
         await action.remove() if action else None
 
 
+# -- Functions to keep a bounded rolling message history in the user session --
+def load_message_history(steps: Optional[List[dict]] = None) -> None:
+    """
+    Initialize the session message history, from the steps of a resumed thread if given.
+    This is the only time the history is read from the data layer, every turn then appends to it.
+    """
+    history = deque(maxlen=MESSAGE_HISTORY_LIMIT)
+    for step in steps or []:
+        if step.get("type") in ["user_message", "assistant_message"]:
+            role = "user" if step.get("type") == "user_message" else "assistant"
+            history.append({"content": str(step.get("output") or "")[:MESSAGE_HISTORY_CHAR_LIMIT], "role": role})
+    cl.user_session.set("message_history", history)
+
+
+def append_message_history(content: str, role: Literal["user", "assistant"]) -> None:
+    """Append a message to the session message history, dropping the oldest beyond MESSAGE_HISTORY_LIMIT."""
+    history: Optional[deque] = cl.user_session.get("message_history")
+    if history is None:
+        load_message_history()
+        history = cl.user_session.get("message_history")
+    history.append({"content": str(content)[:MESSAGE_HISTORY_CHAR_LIMIT], "role": role})
+
+
+def get_message_history() -> List[Dict[str, str]]:
+    """Returns a snapshot of the session message history."""
+    return list(cl.user_session.get("message_history") or [])
+
+
+# -- Functions to run follow-up LLM calls off the critical path of a turn --
+def start_post_response_task(msg: cl.Message, suggest_next_responses: bool = True) -> asyncio.Task:
+    """
+    Schedule the follow-up generation of an answer as a background task of the user session.
+    It is cancelled by `cancel_post_response_task` when the user sends a new message.
+    """
+    cancel_post_response_task()
+    task = asyncio.create_task(generate_post_response(get_message_history(), msg, suggest_next_responses))
+    cl.user_session.set("post_response_task", task)
+    return task
+
+
+def cancel_post_response_task() -> None:
+    """Cancel the follow-up generation of the previous answer, if it is still running."""
+    task: Optional[asyncio.Task] = cl.user_session.get("post_response_task")
+    if task and not task.done():
+        task.cancel()
+    cl.user_session.set("post_response_task", None)
+
+
+async def generate_post_response(message_history: List[Dict[str, str]], msg: cl.Message, suggest_next_responses: bool = True) -> None:
+    """
+    Generate the next response suggestions and the chat title concurrently, then attach them to the chat.
+    1. Run the needed LLM calls with `asyncio.gather` over the message history (ending with `msg`)
+    2. Attach the next response actions to `msg` and update the chat title
+    """
+    try:
+        should_summarize = len(message_history) == 2
+        session_id = cl.user_session.get("id")
+
+        # -- 1. Concurrent LLM calls
+        jobs = {}
+        if suggest_next_responses:
+            jobs["next_response"] = generate_next_response(message_history, session_id)
+        if should_summarize:
+            jobs["conv_summary"] = generate_conv_summary(message_history, session_id)
+        if not jobs:
+            return
+
+        results = dict(zip(jobs.keys(), await asyncio.gather(*jobs.values(), return_exceptions=True)))
+        for name, result in results.items():
+            if isinstance(result, Exception):
+                log.error(f"Failed to generate {name}: {result}")
+
+        # -- 2. Attach results
+        next_response = results.get("next_response")
+        if next_response and not isinstance(next_response, Exception):
+            next_response_actions = [
+                cl.Action(
+                    name="next_response",
+                    payload={"user_response": response},
+                    label=response,
+                )
+                for response in next_response.get("next_responses", [])
+            ]
+            cl.user_session.set("next_response_actions", next_response_actions)
+            msg.actions = next_response_actions
+            await msg.update()
+
+        conv_summary = results.get("conv_summary")
+        if conv_summary and not isinstance(conv_summary, Exception):
+            chat_title = conv_summary.title().replace(".", "")
+            await cl.context.emitter.init_thread(chat_title)
+    except asyncio.CancelledError:
+        log.info("Follow-up generation cancelled by a new user message.")
+        raise
+    except Exception as e:
+        log.error(f"Error generating follow-up of the answer: {e}")
+
+
+# -- Function to warm the app up at boot, off the critical path of the first requests --
+def start_background_warmup() -> threading.Thread:
+    """
+    Compile (or load from the numba cache) the ranking kernels in a background thread, so the app serves right away
+    and the first recommendation does not wait for the JIT compilation. The ranker is imported by the thread.
+    Then run the starters and popular queries for the default preferences, to fill the query, search and ranking caches.
+    """
+
+    def warmup() -> None:
+        try:
+            from src.ranker.warmup import warmup_ranking_kernels
+
+            warmup_ranking_kernels()
+        except Exception as e:
+            log.error(f"Error warming up the ranking: {e}")
+
+        try:
+            from src.chat.prewarm import prewarm_caches
+
+            prewarm_caches()
+        except Exception as e:
+            log.error(f"Error pre-warming the caches: {e}")
+
+    thread = threading.Thread(target=warmup, name="warmup", daemon=True)
+    thread.start()
+    return thread
+
+
 # -- Function to initialize user session and preferences --
 async def init_user_session():
     """
     1. Get authenticated user
-    2. Initialize S3 client
-    3. Load (or create) get_config_file() on S3
-    4. Ensure user preferences exist
-    5. Create the agent and store everything in user_session
+    2. Load the user preferences (per-user S3 object cached in memory, revalidated with a conditional GET)
+    3. Create the agent and store everything in user_session
     Returns: username, welcome message
     """
     # -- 1. Get authenticated user
     user = cl.user_session.get("user")
     username = user.identifier
-    s3_client = S3Client(bucket_name=os.getenv("BUCKET_NAME"))
-    # -- 2. Load/initialize config file on S3
+    cl.user_session.set("username", username)
+
+    # -- 2. Load user preferences
     try:
-        objects = s3_client.list_objects()
-        if not any(obj["file"] == get_config_file() for obj in objects):
-            default_conf = {"credentials": {"usernames": {}}, "preferences": {}}
-            s3_client.write_object(get_config_file(), yaml.dump(default_conf))
-
-        raw = s3_client.read_object(get_config_file())
-        config = yaml.safe_load(raw)
-        cl.user_session.set("config", config)
+        user_prefs = await asyncio.to_thread(preference_store.get, username, refresh=True)
     except Exception as e:
-        await cl.Message(content=f"Error handling config file in S3: {e}").send()
+        await cl.Message(content=f"Error loading preferences from S3: {e}").send()
         return None, None
 
-    # -- 3. Set user and preferences
-    cl.user_session.set("username", username)
-
-    default_prefs = {
-        "food_score": 0.55,
-        "ambience_score": 0.15,
-        "price_score": 0.15,
-        "service_score": 0.15,
-        "distance_preference": False,
-        "distance_km": 15,
-    }
-    prefs_container = config.setdefault("preferences", {})
-    user_prefs = prefs_container.get(username, default_prefs.copy())
-
-    if username not in prefs_container:
-        prefs_container[username] = user_prefs
-        s3_client.write_object(get_config_file(), yaml.dump(config))
-
     cl.user_session.set("user_preferences", user_prefs)
 
-    # -- 4. Agent instantiation
+    # -- 3. Agent instantiation
     try:
         if cl.user_session.get("agent"):
             cl.user_session.set("agent", None)
 
-        agent = generate_foodbot_agent(chat_store_token_limit=4096, callback="chainlit", verbose=True)
+        agent = generate_foodbot_agent(chat_store_token_limit=MEMORY_TOKEN_LIMIT, callback="chainlit", verbose=True)
         cl.user_session.set("agent", agent)
-        cl.user_session.set("s3_client", s3_client)
 
     except Exception as e:
         await cl.Message(content=f"Error initializing agent: {e}").send()
         return None, None
 
-    # -- 5. `Welcome` message with user's name
+    # -- 4. `Welcome` message with user's name
     display_name = get_display_name() or "food lover"
     welcome_msg = get_welcome_message(name=display_name)
 
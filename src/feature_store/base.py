@@ -0,0 +1,83 @@
+from abc import ABC, abstractmethod
+from typing import Iterable, List, Optional
+
+import pandas as pd
+from loguru import logger as log
+
+from src.helper.cache import LRUCache
+from src.helper.vars import FEATURE_STORE_CACHE_SIZE, LOCATION_DETAIL_COLUMNS
+
+# -- Location records shared by every back end, so hot restaurants are served from memory in any mode --
+location_record_cache = LRUCache(maxsize=FEATURE_STORE_CACHE_SIZE)
+
+
+class FeatureStore(ABC):
+    """Base class for location feature stores, with a shared read-through LRU of location records in front."""
+
+    def __init__(self, id_column: str = "location_id", cache: Optional[LRUCache] = None):
+        """
+        Initialize the FeatureStore.
+
+        Args:
+            id_column (str): Name of the id column. Default: 'location_id'.
+            cache (Optional[LRUCache]): Record cache. Defaults to the process-wide `location_record_cache`.
+        """
+        self.id_column = id_column
+        self.cache = cache if cache is not None else location_record_cache
+
+    @classmethod
+    @abstractmethod
+    def from_source(cls, source: Optional[str] = None) -> "FeatureStore":
+        """Create the store for `source` (a file path, a table id, ...). None means the default location features."""
+
+    @abstractmethod
+    def _fetch_by_ids(self, ids: List[int], columns: List[str]) -> List[dict]:
+        """Fetch the records for `ids` from the back end, projected to `columns`."""
+
+    @abstractmethod
+    def read_all(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Read the whole source, e.g. to (re)load the vector store."""
+
+    @abstractmethod
+    def _write_columns(self, dataframe: pd.DataFrame) -> None:
+        """Update the columns of `dataframe` for the records of its id column, adding the columns that do not exist yet."""
+
+    def write_columns(self, dataframe: pd.DataFrame) -> None:
+        """
+        Write back computed columns (e.g. precomputed descriptions) for the records of `dataframe`,
+        keyed by the id column. The cached records of these ids are dropped.
+        """
+        if dataframe.empty:
+            return
+
+        self._write_columns(dataframe)
+        for _id in dataframe[self.id_column]:
+            self.cache.pop(int(_id))
+        log.success(f"Wrote columns {[c for c in dataframe.columns if c != self.id_column]} for {len(dataframe)} records.")
+
+    def fetch_by_ids(self, ids: Iterable[int], columns: Optional[List[str]] = None) -> List[dict]:
+        """
+        Return the records for `ids`, in the order requested. Unknown ids are skipped.
+        Records already cached with all the requested `columns` are served from memory,
+        only the remaining ids are fetched from the back end (and then cached).
+        """
+        columns = list(columns) if columns else list(LOCATION_DETAIL_COLUMNS)
+        ids = list(dict.fromkeys(int(_id) for _id in ids))
+
+        records = {}
+        missing_ids = []
+        for _id in ids:
+            record = self.cache.get(_id)
+            if record is not None and all(column in record for column in columns):
+                records[_id] = record
+            else:
+                missing_ids.append(_id)
+
+        if missing_ids:
+            log.info(f"Feature store cache: {len(records)} hits, {len(missing_ids)} misses.")
+            for record in self._fetch_by_ids(missing_ids, columns):
+                _id = int(record[self.id_column])
+                records[_id] = {**self.cache.get(_id, {}), **record}
+                self.cache.set(_id, records[_id])
+
+        return [{column: records[_id].get(column) for column in columns} for _id in ids if _id in records]
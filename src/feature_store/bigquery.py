@@ -0,0 +1,68 @@
+import os
+import threading
+from typing import List, Optional, Set
+
+import pandas as pd
+
+from src.bigquery.handler import BigQueryHandler
+from src.feature_store.base import FeatureStore
+from src.helper.vars import BIGQUERY_PROJECT_ID, FS_LOCATION_BATCH_WINDOW, FS_LOCATION_TABLE, PROJECT_ROOT
+
+
+class BigQueryFeatureStore(FeatureStore):
+    """Feature store over a BigQuery table, using parameterized and batched id lookups."""
+
+    def __init__(self, handler: BigQueryHandler, table_id: str, batch_window: float = FS_LOCATION_BATCH_WINDOW, **kwargs):
+        """
+        Initialize the BigQueryFeatureStore.
+
+        Args:
+            handler (BigQueryHandler): Handler used to run the queries.
+            table_id (str): Fully qualified table id, e.g. `project.dataset.table`.
+            batch_window (float): Seconds to wait for concurrent lookups to merge into one query.
+        """
+        super().__init__(**kwargs)
+        self.handler = handler
+        self.table_id = table_id
+        self.batch_window = batch_window
+
+        self._table_columns: Optional[Set[str]] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_source(cls, source: Optional[str] = None) -> "BigQueryFeatureStore":
+        handler = BigQueryHandler(
+            project_id=BIGQUERY_PROJECT_ID,
+            credentials_path=os.path.join(PROJECT_ROOT, "sa.json"),
+        )
+        return cls(handler, table_id=source or FS_LOCATION_TABLE)
+
+    def get_table_columns(self) -> Set[str]:
+        """Columns of the table, read from its schema once (and again after `write_columns` adds columns)."""
+        if self._table_columns is None:
+            with self._lock:
+                if self._table_columns is None:
+                    self._table_columns = set(self.handler.get_table_columns(self.table_id))
+        return self._table_columns
+
+    def _fetch_by_ids(self, ids: List[int], columns: List[str]) -> List[dict]:
+        """Only the existing columns are queried: optional ones (e.g. precomputed descriptions) come back as None."""
+        table_columns = self.get_table_columns()
+        records = self.handler.fetch_by_ids(
+            self.table_id,
+            ids,
+            columns=[column for column in columns if column in table_columns],
+            id_column=self.id_column,
+            batch_window=self.batch_window,
+        )
+        return [{column: record.get(column) for column in dict.fromkeys([*columns, self.id_column])} for record in records]
+
+    def read_all(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        if columns:
+            columns = [column for column in columns if column in self.get_table_columns()]
+        projection = ", ".join(columns) if columns else "*"
+        return self.handler.fetch_bigquery(f"SELECT {projection} FROM `{self.table_id}`")
+
+    def _write_columns(self, dataframe: pd.DataFrame) -> None:
+        self.handler.update_by_ids(self.table_id, dataframe, id_column=self.id_column)
+        self._table_columns = None
@@ -0,0 +1,31 @@
+import importlib
+from functools import lru_cache
+from typing import Dict, Optional, Type
+
+from src.feature_store.base import FeatureStore
+from src.helper.utils import get_feature_storage_mode
+
+# -- Storage mode -> back end ("module:class", imported on first use so the BigQuery SDK is only loaded in remote mode).
+# -- Register new back ends here, callers only use `get_feature_store` --
+FEATURE_STORE_BACKENDS: Dict[str, str] = {
+    "local": "src.feature_store.local:LocalFeatureStore",
+    "remote": "src.feature_store.bigquery:BigQueryFeatureStore",
+}
+
+
+def get_feature_store_class(mode: str) -> Type[FeatureStore]:
+    """Import and return the back end class of a feature storage mode."""
+    if mode not in FEATURE_STORE_BACKENDS:
+        raise ValueError(f"Invalid feature storage mode: {mode}. Available modes: {list(FEATURE_STORE_BACKENDS)}")
+
+    module_name, class_name = FEATURE_STORE_BACKENDS[mode].split(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+@lru_cache(maxsize=None)
+def get_feature_store(mode: Optional[str] = None, source: Optional[str] = None) -> FeatureStore:
+    """
+    Returns the process-wide feature store for `mode` (defaults to the configured feature storage mode).
+    `source` overrides the default location features (parquet path or BigQuery table id).
+    """
+    return get_feature_store_class(mode or get_feature_storage_mode()).from_source(source)
@@ -0,0 +1,77 @@
+import os
+import threading
+from typing import Dict, List, Optional
+
+import pandas as pd
+import pyarrow.parquet as pq
+from loguru import logger as log
+
+from src.feature_store.base import FeatureStore
+from src.helper.vars import FS_LOCATION_PATH, LOCATION_DETAIL_COLUMNS
+
+
+class LocalFeatureStore(FeatureStore):
+    """Feature store over a local parquet file, held in memory and indexed by its id column."""
+
+    def __init__(self, data_path: str, columns: Optional[List[str]] = None, **kwargs):
+        """
+        Initialize the LocalFeatureStore. The file is not read until the first lookup (or `load`).
+
+        Args:
+            data_path (str): Path to the parquet file.
+            columns (Optional[List[str]]): Columns to keep in memory. Defaults to all columns.
+        """
+        super().__init__(**kwargs)
+        self.data_path = data_path
+        self.columns = list(columns) if columns else None
+        if self.columns and self.id_column not in self.columns:
+            self.columns.append(self.id_column)
+
+        self._index: Optional[Dict[int, dict]] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_source(cls, source: Optional[str] = None) -> "LocalFeatureStore":
+        return cls(source or FS_LOCATION_PATH, columns=LOCATION_DETAIL_COLUMNS)
+
+    def load(self) -> Dict[int, dict]:
+        """
+        Read the projected columns once (memory-mapped through Arrow) and build the `id -> record` index.
+        Safe to call concurrently: only the first caller reads the file.
+        """
+        if self._index is not None:
+            return self._index
+
+        with self._lock:
+            if self._index is None:
+                # -- Optional columns (e.g. precomputed descriptions) may not be in the file yet
+                available_columns = set(pq.read_schema(self.data_path).names)
+                columns = [column for column in self.columns if column in available_columns] if self.columns else None
+                dataframe = pd.read_parquet(self.data_path, columns=columns, engine="pyarrow", memory_map=True)
+                self._index = {int(record[self.id_column]): record for record in dataframe.to_dict("records")}
+                log.success(f"Loaded {len(self._index)} records from {self.data_path} into the local feature store.")
+
+        return self._index
+
+    def _fetch_by_ids(self, ids: List[int], columns: List[str]) -> List[dict]:
+        """Hash probes on the in-memory index, no disk I/O after the first load."""
+        index = self.load()
+        return [{column: index[_id].get(column) for column in columns} for _id in ids if _id in index]
+
+    def read_all(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        return pd.read_parquet(self.data_path, columns=columns, engine="pyarrow")
+
+    def _write_columns(self, dataframe: pd.DataFrame) -> None:
+        """Rewrite the parquet file with the updated columns (atomically, through a temporary file) and drop the index."""
+        with self._lock:
+            source = pd.read_parquet(self.data_path, engine="pyarrow").set_index(self.id_column)
+            updates = dataframe.set_index(self.id_column)
+            for column in updates.columns:
+                if column not in source.columns:
+                    source[column] = None
+                source.loc[source.index.intersection(updates.index), column] = updates[column]
+
+            temporary_path = f"{self.data_path}.tmp"
+            source.reset_index().to_parquet(temporary_path, engine="pyarrow", index=False)
+            os.replace(temporary_path, self.data_path)
+            self._index = None
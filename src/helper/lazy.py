@@ -0,0 +1,42 @@
+import threading
+from typing import Any, Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class LazyObject(Generic[T]):
+    """
+    Module-level stand-in for a client or model that is only built on first use (thread-safe).
+    Attribute access is forwarded to the built object, so `client.method(...)` call sites stay unchanged
+    while importing the module that declares the client costs nothing.
+    Pass `get()` where the real instance is needed (type checks, pydantic fields, ...).
+    """
+
+    def __init__(self, factory: Callable[[], T]):
+        """
+        Initialize the LazyObject.
+
+        Args:
+            factory (Callable[[], T]): Builds the object, called once on first use.
+        """
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_instance", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def get(self) -> T:
+        """Returns the object, building it on the first call."""
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    object.__setattr__(self, "_instance", self._factory())
+        return self._instance
+
+    @property
+    def is_built(self) -> bool:
+        return self._instance is not None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.get(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self.get(), name, value)
@@ -1,9 +1,11 @@
 import base64
 import os
+import re
 from math import atan2, cos, radians, sin, sqrt
 from typing import Literal, Tuple
 
 import requests
+import unidecode
 from dotenv import load_dotenv
 
 from src.helper.vars import CONFIG_FILE, FEATURE_STORAGE_MODE, WELCOME_MESSAGE
@@ -35,6 +37,24 @@ def encode_url(url_string: str) -> str:
     return requests.utils.requote_uri(url_string)
 
 
+def normalize_query(query: str) -> str:
+    """Normalizes a natural query into a stable key: ascii, lower case, sorted unique words."""
+    words = re.findall(r"[a-z0-9]+", unidecode.unidecode(str(query or "")).lower())
+    return " ".join(sorted(set(words)))
+
+
+def detect_city(text: str) -> Literal["Ha Noi", "Ho Chi Minh", "Whatever"]:
+    """Detect the city named in a message (e.g. 'hcmc', 'Sài Gòn', 'Hanoi'), 'Whatever' if none or both are named."""
+    text = f" {unidecode.unidecode(text).lower()} "
+    cities = set()
+    if re.search(r"\b(ho chi minh|hcmc?|sai ?gon)\b", text):
+        cities.add("Ho Chi Minh")
+    if re.search(r"\b(ha ?noi)\b", text):
+        cities.add("Ha Noi")
+
+    return cities.pop() if len(cities) == 1 else "Whatever"
+
+
 def encode_b64_string(string: str) -> str:
     """Encodes a string to be base64 encoded."""
     if not string:
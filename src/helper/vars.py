@@ -1,12 +1,116 @@
 import os
 
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 TOP_K = 5
 COSINE_THRESHOLD = 0.74
 EMBEDDER_MODEL_NAME = "BAAI/bge-small-en-v1.5"
 FEATURE_STORAGE_MODE = "local"
+BIGQUERY_PROJECT_ID = "tripadvisor-recommendations"
+FS_LOCATION_TABLE = "tripadvisor-recommendations.fs_tripadvisor.fs_location"
+FS_LOCATION_BATCH_WINDOW = 0.05
+FEATURE_STORE_CACHE_SIZE = 2048
+SESSION_CACHE_SIZE = 1024
+SESSION_CACHE_TTL = 60 * 60
+SESSION_CANDIDATE_LIMIT = 100
+DESCRIPTION_CACHE_SIZE = 4096
+DESCRIPTION_CACHE_TTL = 24 * 60 * 60
+DESCRIPTION_COLUMN = "short_description"
+DESCRIPTION_BATCH_SIZE = 10
+DESCRIPTION_CONCURRENCY = 4
+FS_LOCATION_PATH = os.path.join(PROJECT_ROOT, "include", "data", "fs_location.parquet")
+LOCATION_DETAIL_COLUMNS = [
+    "location_id",
+    "location_name",
+    "address",
+    "location_map",
+    "location_url",
+    "image_url",
+    "cuisine_list",
+    "price_range",
+    "location_overall_rate",
+    "short_description",
+]
+QDRANT_PAYLOAD_COLUMNS = [
+    "location_id",
+    "location_name",
+    "city",
+    "latitude",
+    "longitude",
+    "location_overall_rate",
+    "review_count",
+    "price_range",
+    "food_negative",
+    "food_positive",
+    "price_negative",
+    "price_positive",
+    "ambience_negative",
+    "ambience_positive",
+    "service_negative",
+    "service_positive",
+]
+SEMANTIC_CACHE_SIZE = 512
+SEMANTIC_CACHE_TTL = 6 * 60 * 60
+SEMANTIC_CACHE_THRESHOLD = 0.92
+SEMANTIC_CACHE_QUERY_AGREEMENT = 0.8
+PREFERENCE_QUANTUM = 0.1
+TOOL_CALL_WORKERS = 4
+PREFETCH_WORKERS = 4
+PREFETCH_LIMIT = TOP_K * 200
+PREFETCH_SCORE_THRESHOLD = COSINE_THRESHOLD - 0.1
+PREFETCH_AGREEMENT = 0.85
+ROUTER_THRESHOLD = 0.75
+ROUTER_MAX_QUERY_WORDS = 8
+CANDIDATE_ENCODING = "compact"
+CANDIDATE_SCORE_DECIMALS = 2
+RANKING_TOOL_NAME = "candidate_generation_and_ranking"
+ENRICH_TOOL_NAME = "enrich_restaurant_recommendations"
+MEMORY_TOKEN_LIMIT = 4096
+MEMORY_RECENT_TURNS = 1
+MEMORY_TOOL_SUMMARY_CHARS = 300
+MEMORY_CACHE_SIZE = 1024
+OPENAI_MAX_CONNECTIONS = 100
+S3_MAX_POOL_CONNECTIONS = 50
+S3_OBJECT_CACHE_SIZE = 1024
+PREFERENCES_PREFIX = "preferences/"
+PREFERENCES_FLUSH_DELAY = 5.0
+DEFAULT_USER_PREFERENCES = {
+    "food_score": 0.55,
+    "ambience_score": 0.15,
+    "price_score": 0.15,
+    "service_score": 0.15,
+    "distance_preference": False,
+    "distance_km": 15,
+}
+EMBEDDING_MAX_BATCH_SIZE = 64
+EMBEDDING_MAX_WAIT = 0.005
+EMBEDDING_CACHE_SIZE = 4096
+SEARCH_CACHE_SIZE = 256
+SEARCH_CACHE_TTL = 60 * 60
+RANKING_CACHE_SIZE = 512
+RANKING_CACHE_TTL = 60 * 60
+IMPORT_TIME_BUDGET = 5.0
+LAZY_IMPORT_MODULES = ["fastembed", "onnxruntime", "qdrant_client", "numba", "scipy.stats", "google.cloud.bigquery"]
+NUMBA_CACHE_DIR = os.environ.get("NUMBA_CACHE_DIR", os.path.join(PROJECT_ROOT, ".cache", "numba"))
+MESSAGE_HISTORY_LIMIT = 20
+MESSAGE_HISTORY_CHAR_LIMIT = 500
 CONFIG_FILE = "secret.yaml"
 OPENAI_MODEL = "gpt-4o-mini"
 OPENAI_CONFIG = {"timeout": 60, "max_retries": 1, "api_key": os.environ.get("OPENAI_API_KEY")}
+ENRICH_UNAVAILABLE_MESSAGE = "Unable to generate recommendations at this time."
+STARTER_MESSAGES = [
+    "I want to eat BBQ that is affordable",
+    "I want to eat sushi that is fresh and delicious.",
+    "I want to eat Pho at Ho Chi Minh City",
+    "I really love French fine dining with great service and a nice atmosphere.",
+]
+# -- Popular queries pre-warmed at boot with the starters, "|"-separated in the PREWARM_QUERIES environment variable --
+PREWARM_QUERIES = [query.strip() for query in os.environ.get("PREWARM_QUERIES", "").split("|") if query.strip()] or [
+    "I want to eat Pho at Ha Noi",
+    "Best Korean BBQ in Ho Chi Minh City",
+    "Recommend a good sushi place in Ho Chi Minh City",
+    "Where can I get delicious bun cha in Hanoi?",
+    "affordable seafood in Ha Noi",
+]
 WELCOME_MESSAGE = """
 Hi <b style='color: #f5145f'>{name}</b>, welcome to the Food Advisor Bot! 🤖
 
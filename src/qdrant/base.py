@@ -1,8 +1,17 @@
+import json
 import os
 from abc import ABC
+from typing import TYPE_CHECKING, Iterable, Optional
 
 from loguru import logger as log
-from qdrant_client import QdrantClient
+
+if TYPE_CHECKING:
+    from qdrant_client import QdrantClient
+
+
+def estimate_payload_bytes(payloads: Iterable[dict]) -> int:
+    """Estimate the storage size of Qdrant payloads as their JSON-encoded size in bytes."""
+    return sum(len(json.dumps(payload, default=str).encode("utf-8")) for payload in payloads)
 
 
 class QdrantBase(ABC):
@@ -12,11 +21,13 @@ class QdrantBase(ABC):
         qdrant_api_key: str = None,
         collection_name: str = None,
         vector_size: int = 384,
+        client: Optional["QdrantClient"] = None,
     ):
         """
         Initialize the QdrantBase class.
         :param qdrant_api_url: URL for the Qdrant API.
         :param qdrant_api_key: API key for Qdrant.
+        :param client: Existing Qdrant client to share (and its connection pool), a new one is created if not given.
         """
 
         if not qdrant_api_url or not qdrant_api_key:
@@ -26,17 +37,19 @@ class QdrantBase(ABC):
             self.qdrant_api_url = qdrant_api_url
             self.qdrant_api_key = qdrant_api_key
 
-        self.client = self.__initialize_qdrant()
+        self.client = client or self.__initialize_qdrant()
         self.collection_name = collection_name
         self.vector_size = vector_size
 
         if self.collection_name:
             self.__create_collection_if_not_exists()
 
-    def __initialize_qdrant(self) -> QdrantClient:
+    def __initialize_qdrant(self) -> "QdrantClient":
         """
-        Initialize the Qdrant client.
+        Initialize the Qdrant client. `qdrant_client` (and the fastembed integration it loads) is imported here, on first use.
         """
+        from qdrant_client import QdrantClient
+
         try:
             log.info("Initializing Qdrant client...")
             if not self.qdrant_api_url or not self.qdrant_api_key:
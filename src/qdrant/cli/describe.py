@@ -0,0 +1,25 @@
+import argparse
+
+from src.chat.describe import RestaurantDescriptionPrecomputer
+from src.feature_store.factory import get_feature_store
+from src.helper.vars import DESCRIPTION_BATCH_SIZE, DESCRIPTION_CONCURRENCY
+
+parser = argparse.ArgumentParser(description="Precompute the short descriptions of the restaurants into the feature store.")
+parser.add_argument("--mode", choices=["local", "remote"], default=None, help="Feature storage mode. Defaults to the configured one.")
+parser.add_argument("--source", default=None, help="Parquet file or BigQuery table. Defaults to the location features.")
+parser.add_argument("--checkpoint", required=True, help="JSONL checkpoint file, reused to resume an interrupted run.")
+parser.add_argument("--batch_size", type=int, default=DESCRIPTION_BATCH_SIZE, help="Restaurants per LLM request.")
+parser.add_argument("--concurrency", type=int, default=DESCRIPTION_CONCURRENCY, help="Maximum LLM requests in flight.")
+parser.add_argument("--overwrite", action="store_true", help="Describe again the restaurants that already have a description.")
+args = parser.parse_args()
+
+
+if __name__ == "__main__":
+    precomputer = RestaurantDescriptionPrecomputer(
+        feature_store=get_feature_store(mode=args.mode, source=args.source),
+        checkpoint_path=args.checkpoint,
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        overwrite=args.overwrite,
+    )
+    precomputer.run()
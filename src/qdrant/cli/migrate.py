@@ -0,0 +1,14 @@
+import argparse
+
+from src.qdrant.migrate import QdrantPayloadMigrator
+
+parser = argparse.ArgumentParser(description="Strip cold fields from the payloads of an existing Qdrant collection.")
+parser.add_argument("--collection", required=True, help="Qdrant collection name.")
+parser.add_argument("--batch_size", type=int, default=256, help="Points per scroll/delete batch.")
+parser.add_argument("--dry_run", action="store_true", help="Only report the memory that would be saved.")
+args = parser.parse_args()
+
+
+if __name__ == "__main__":
+    migrator = QdrantPayloadMigrator(collection_name=args.collection, batch_size=args.batch_size)
+    migrator.slim_payloads(dry_run=args.dry_run)
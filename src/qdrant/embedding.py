@@ -0,0 +1,133 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+from loguru import logger as log
+
+from src.helper.cache import LRUCache
+from src.helper.vars import EMBEDDER_MODEL_NAME, EMBEDDING_CACHE_SIZE, EMBEDDING_MAX_BATCH_SIZE, EMBEDDING_MAX_WAIT
+
+if TYPE_CHECKING:
+    from fastembed import TextEmbedding
+
+
+class EmbeddingService:
+    """
+    Process-wide text embedder holding a single copy of the model.
+    Concurrent `embed` calls (queries of every session, semantic cache, router, ...) are queued and embedded together:
+    a background worker takes the first pending request, waits at most `max_wait` seconds for more, then runs
+    one model call for the micro-batch and hands every caller its own vectors.
+    Vectors of the micro-batched texts (queries, messages) are memoized, so a query embedded by the boot pre-warm
+    or an earlier session is not embedded again.
+    The model (and fastembed/onnxruntime) is loaded, and the worker started, on the first embed.
+    """
+
+    def __init__(
+        self,
+        model_name: str = EMBEDDER_MODEL_NAME,
+        max_batch_size: int = EMBEDDING_MAX_BATCH_SIZE,
+        max_wait: float = EMBEDDING_MAX_WAIT,
+        cache_size: int = EMBEDDING_CACHE_SIZE,
+    ):
+        """
+        Initialize the EmbeddingService.
+
+        Args:
+            model_name (str): Fastembed model to load.
+            max_batch_size (int): Maximum number of texts per model call. Larger requests are embedded directly.
+            max_wait (float): Seconds the first request of a micro-batch waits for the next ones.
+            cache_size (int): Maximum number of memoized query vectors.
+        """
+        self.model_name = model_name
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+
+        self._model: Optional["TextEmbedding"] = None
+        self._queue: "queue.Queue[Tuple[List[str], Future]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._cache = LRUCache(maxsize=cache_size)
+
+    @property
+    def model(self) -> "TextEmbedding":
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from fastembed import TextEmbedding
+
+                    log.info(f"Loading embedding model {self.model_name}...")
+                    self._model = TextEmbedding(model_name=self.model_name)
+        return self._model
+
+    def embed(self, documents: Union[str, Iterable[str]], **kwargs) -> List[np.ndarray]:
+        """
+        Embed `documents`, same call as `TextEmbedding.embed` (but returns a list).
+        Bulk jobs (at least `max_batch_size` texts, or with model kwargs such as `parallel`) bypass the micro-batching.
+        """
+        texts = [documents] if isinstance(documents, str) else list(documents)
+        if not texts:
+            return []
+        if len(texts) >= self.max_batch_size or kwargs:
+            return list(self.model.embed(texts, **kwargs))
+
+        vectors = [self._cache.get(text) for text in texts]
+        missing = [text for text, vector in zip(texts, vectors) if vector is None]
+        if missing:
+            embedded = self._embed_queued(missing)
+            for text, vector in zip(missing, embedded):
+                self._cache.set(text, vector)
+            embedded = iter(embedded)
+            vectors = [next(embedded) if vector is None else vector for vector in vectors]
+        # -- copies, so callers normalizing in place do not alter the memoized vectors --
+        return [vector.copy() for vector in vectors]
+
+    def _embed_queued(self, texts: List[str]) -> List[np.ndarray]:
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name="embedding-service", daemon=True)
+                    self._worker.start()
+
+        future: Future = Future()
+        self._queue.put((texts, future))
+        return future.result()
+
+    def _run(self) -> None:
+        while True:
+            requests = [self._queue.get()]
+            batch_size = len(requests[0][0])
+            deadline = time.monotonic() + self.max_wait
+
+            # -- gather the requests arriving within the wait window, up to a full batch --
+            while batch_size < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                requests.append(request)
+                batch_size += len(request[0])
+
+            self._embed_requests(requests)
+
+    def _embed_requests(self, requests: List[Tuple[List[str], Future]]) -> None:
+        texts = [text for request_texts, _ in requests for text in request_texts]
+        try:
+            vectors = list(self.model.embed(texts, batch_size=len(texts)))
+        except Exception as e:
+            log.error(f"Error embedding a batch of {len(texts)} texts: {e}")
+            for _, future in requests:
+                future.set_exception(e)
+            return
+
+        offset = 0
+        for request_texts, future in requests:
+            future.set_result(vectors[offset : offset + len(request_texts)])
+            offset += len(request_texts)
+        if len(requests) > 1:
+            log.debug(f"Embedded {len(requests)} requests ({len(texts)} texts) in one batch.")
@@ -1,16 +1,14 @@
 import uuid
 import warnings
 
-import pandas as pd
 from fastembed import TextEmbedding
 from loguru import logger as log
 from qdrant_client.models import PointStruct
 from tqdm.rich import tqdm
 
-from src.bigquery.handler import BigQueryHandler
-from src.helper.utils import get_feature_storage_mode
-from src.helper.vars import EMBEDDER_MODEL_NAME
-from src.qdrant.base import QdrantBase
+from src.feature_store.factory import get_feature_store
+from src.helper.vars import EMBEDDER_MODEL_NAME, QDRANT_PAYLOAD_COLUMNS
+from src.qdrant.base import QdrantBase, estimate_payload_bytes
 
 warnings.filterwarnings("ignore")
 
@@ -21,21 +19,13 @@ class QdrantLoader(QdrantBase):
         self.source = source
         self.embedding_column = embedding_column
 
-        if get_feature_storage_mode() != "local":
-            self.bigquery_client = BigQueryHandler(project_id="tripadvisor-recommendations", credentials_path="./sa.json")
-        else:
-            log.warning("Using local storage mode, BigQuery client will not be initialized.")
-            self.bigquery_client = None
+        self.feature_store = get_feature_store(source=source)
         self.embedder = TextEmbedding(model_name=EMBEDDER_MODEL_NAME)
 
     def load_data(self):
         log.info(f"Querying source: {self.source}")
 
-        if self.bigquery_client:
-            records = self.bigquery_client.fetch_bigquery_as_list(f"SELECT * FROM {self.source}")
-            df = pd.DataFrame(records)
-        else:
-            df = pd.read_parquet(self.source)  # source must be a local parquet file in local storage mode
+        df = self.feature_store.read_all()  # source is a parquet file in local mode, a BigQuery table in remote mode
 
         if df.empty:
             log.error("No records found.")
@@ -51,7 +41,14 @@ class QdrantLoader(QdrantBase):
             vectors.extend(batch_vectors)
         log.info("Embedding complete.")
 
-        payloads = df.to_dict(orient="records")
+        # -- Only hot fields (filtering & ranking) go to Qdrant, descriptive fields stay in the feature store
+        full_payload_bytes = estimate_payload_bytes(df.to_dict(orient="records"))
+        payloads = df[[col for col in QDRANT_PAYLOAD_COLUMNS if col in df.columns]].to_dict(orient="records")
+        payload_bytes = estimate_payload_bytes(payloads)
+        log.info(
+            f"Payload size: {payload_bytes / 1024:.1f} KiB instead of {full_payload_bytes / 1024:.1f} KiB "
+            f"for full rows ({(full_payload_bytes - payload_bytes) / 1024:.1f} KiB saved)."
+        )
         log.info(f"Upserting {len(payloads)} records to Qdrant...")
         points = [PointStruct(id=str(uuid.uuid4()), vector=vector, payload=payload) for vector, payload in zip(vectors, payloads)]
 
@@ -0,0 +1,62 @@
+from loguru import logger as log
+
+from src.helper.vars import QDRANT_PAYLOAD_COLUMNS
+from src.qdrant.base import QdrantBase, estimate_payload_bytes
+
+
+class QdrantPayloadMigrator(QdrantBase):
+    """Strip cold (descriptive) fields from the payloads of an existing collection, keeping only QDRANT_PAYLOAD_COLUMNS."""
+
+    def __init__(self, collection_name, batch_size: int = 256):
+        super().__init__(collection_name=collection_name)
+        self.batch_size = batch_size
+
+    def slim_payloads(self, dry_run: bool = False) -> dict:
+        """
+        Scroll through the collection and delete every payload key that is not a hot column.
+        Cold fields are still served by the feature store, enrichment loads them lazily.
+
+        Args:
+            dry_run (bool): Only report the memory that would be saved, without modifying the collection.
+
+        Returns:
+            dict: Number of points, payload bytes before and after the migration.
+        """
+        hot_columns = set(QDRANT_PAYLOAD_COLUMNS)
+        report = {"points": 0, "bytes_before": 0, "bytes_after": 0}
+        offset = None
+
+        while True:
+            records, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                limit=self.batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=False,
+            )
+            if not records:
+                break
+
+            payloads = [record.payload or {} for record in records]
+            cold_keys = sorted({key for payload in payloads for key in payload} - hot_columns)
+
+            report["points"] += len(records)
+            report["bytes_before"] += estimate_payload_bytes(payloads)
+            report["bytes_after"] += estimate_payload_bytes({k: v for k, v in payload.items() if k in hot_columns} for payload in payloads)
+
+            if cold_keys and not dry_run:
+                self.client.delete_payload(
+                    collection_name=self.collection_name,
+                    keys=cold_keys,
+                    points=[record.id for record in records],
+                )
+
+            if offset is None:
+                break
+
+        saved = report["bytes_before"] - report["bytes_after"]
+        log.success(
+            f"{'[dry run] ' if dry_run else ''}Slimmed payloads of {report['points']} points in '{self.collection_name}': "
+            f"{report['bytes_before'] / 1024:.1f} KiB -> {report['bytes_after'] / 1024:.1f} KiB ({saved / 1024:.1f} KiB saved)."
+        )
+        return report
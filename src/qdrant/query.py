@@ -1,57 +1,24 @@
 import time
+from typing import TYPE_CHECKING, Optional, Union
 
 import pandas as pd
-from fastembed import TextEmbedding
 
-from src.helper.vars import EMBEDDER_MODEL_NAME
+from src.helper.cache import LRUCache
+from src.helper.vars import QDRANT_PAYLOAD_COLUMNS, SEARCH_CACHE_SIZE, SEARCH_CACHE_TTL
 from src.qdrant.base import QdrantBase
+from src.qdrant.embedding import EmbeddingService
+
+if TYPE_CHECKING:
+    from fastembed import TextEmbedding
 
 
 class QdrantQuery(QdrantBase):
-    def __init__(self, **kwargs):
+    def __init__(self, embedder: Optional[Union["TextEmbedding", EmbeddingService]] = None, **kwargs):
         super().__init__(**kwargs)
-        self.embedder = TextEmbedding(model_name=EMBEDDER_MODEL_NAME)
-        self.selected_columns = [
-            "location_id",
-            "location_name",
-            "address",
-            "city",
-            "location_url",
-            "location_map",
-            "image_url",
-            "image_description",
-            "latitude",
-            "longitude",
-            "location_rank",
-            "location_overall_rate",
-            "review_count",
-            "review_count_scraped",
-            "price_range",
-            "cuisine_list",
-            "food_negative",
-            "food_positive",
-            "food_neutral",
-            "price_negative",
-            "price_positive",
-            "price_neutral",
-            "ambience_negative",
-            "ambience_positive",
-            "ambience_neutral",
-            "service_negative",
-            "service_positive",
-            "service_neutral",
-            "location_negative",
-            "location_positive",
-            "location_neutral",
-            "general_negative",
-            "general_positive",
-            "general_neutral",
-            "friend_type",
-            "solo_type",
-            "business_type",
-            "couple_type",
-            "family_type",
-        ]
+        self.embedder = embedder or EmbeddingService()
+        self.selected_columns = QDRANT_PAYLOAD_COLUMNS
+        # -- Results of recent searches, shared by every session (and filled for the starters by the boot pre-warm) --
+        self.search_cache = LRUCache(maxsize=SEARCH_CACHE_SIZE, ttl=SEARCH_CACHE_TTL)
 
     def search_restaurants(
         self,
@@ -60,6 +27,11 @@ class QdrantQuery(QdrantBase):
         limit: int = 10,
         score_threshold: float = 0.5,
     ) -> pd.DataFrame:
+        cache_key = (natural_query, city, limit, score_threshold)
+        cached = self.search_cache.get(cache_key)
+        if cached is not None:
+            return cached.copy()
+
         try:
             vector = list(self.embedder.embed([natural_query]))[0]
             filters = []
@@ -78,8 +50,8 @@ class QdrantQuery(QdrantBase):
                 query_vector=vector,
                 query_filter=query_filter,
                 limit=limit,
-                with_payload=True,
-                with_vectors=True,
+                with_payload=self.selected_columns,
+                with_vectors=False,
                 score_threshold=score_threshold,
             )
 
@@ -91,7 +63,9 @@ class QdrantQuery(QdrantBase):
                 for hit in search_result
             ]
 
-            return pd.DataFrame(restaurant_list)
+            restaurants = pd.DataFrame(restaurant_list)
+            self.search_cache.set(cache_key, restaurants)
+            return restaurants.copy()
         except Exception as e:
             raise RuntimeError(f"Error searching restaurants: {e}")
         finally:
@@ -1,13 +1,17 @@
-import time
+import os
 from typing import Dict
 
+from src.helper.vars import NUMBA_CACHE_DIR
+
+# -- The compiled kernels (cache=True) persist in NUMBA_CACHE_DIR, numba reads it when it is imported --
+os.environ.setdefault("NUMBA_CACHE_DIR", NUMBA_CACHE_DIR)
+
 import numba as nb
 import numpy as np
 import pandas as pd
-from scipy.stats import rankdata
 
 
-@nb.njit
+@nb.njit(cache=True)
 def compute_concordance(a, b, weights, sum_weights, q_arr, p_arr):
     c = 0.0
     for j in range(a.shape[0]):
@@ -22,7 +26,7 @@ def compute_concordance(a, b, weights, sum_weights, q_arr, p_arr):
     return c / sum_weights
 
 
-@nb.njit
+@nb.njit(cache=True)
 def compute_discordance(a, b, p_arr, v_arr, out):
     for j in range(a.shape[0]):
         diff = b[j] - a[j]
@@ -35,7 +39,7 @@ def compute_discordance(a, b, p_arr, v_arr, out):
     return out
 
 
-@nb.njit
+@nb.njit(cache=True)
 def compute_credibility(c, d, weights, sum_weights):
     cr = c
     for j in range(d.shape[0]):
@@ -44,7 +48,7 @@ def compute_credibility(c, d, weights, sum_weights):
     return cr if cr > 0 else 0.0
 
 
-@nb.njit
+@nb.njit(cache=True)
 def build_outranking(A, weights, sum_weights, q_arr, p_arr, v_arr):
     n, m = A.shape
     outr = np.zeros((n, n), dtype=np.float64)
@@ -98,15 +102,17 @@ def build_electre_iii(
         q_arr = np.array([thresholds[c]["q"] for c in score_columns], dtype=np.float64)
         p_arr = np.array([thresholds[c]["p"] for c in score_columns], dtype=np.float64)
         v_arr = np.array([thresholds[c]["v"] for c in score_columns], dtype=np.float64)
-        A = dataframe[score_columns].to_numpy(dtype=np.float64)
+        # -- C-contiguous like the warm-up arrays, so the cached specialization of the kernels is always the one used --
+        A = np.ascontiguousarray(dataframe[score_columns].to_numpy(dtype=np.float64))
         outranking = build_outranking(A, weights_arr, sum_w, q_arr, p_arr, v_arr)
         net_cred = outranking.sum(axis=1) - outranking.sum(axis=0)
         dataframe["electre_score"] = net_cred
+        # -- scipy.stats is slow to import, only load it with the first ranking --
+        from scipy.stats import rankdata
+
         dataframe["electre_rank"] = rankdata(-net_cred, method="min")
         dataframe = dataframe.sort_values(by="electre_rank").reset_index(drop=True)
         return dataframe
     except Exception as e:
         print(f"Error in build_electre_iii: {e}")
         return pd.DataFrame()
-    finally:
-        time.sleep(1.5)
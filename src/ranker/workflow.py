@@ -1,12 +1,76 @@
 from loguru import logger as log
 
 from src.chat.client import qdrant_client_location
-from src.helper.utils import get_central_location_coords, normalize_weights
+from src.helper.cache import LRUCache, SingleFlight
+from src.helper.utils import get_central_location_coords, normalize_query, normalize_weights
+from src.helper.vars import LOCATION_DETAIL_COLUMNS, RANKING_CACHE_SIZE, RANKING_CACHE_TTL
 from src.ranker.electre_iii import build_electre_iii
 from src.ranker.scoring import compute_distance_score, compute_normalized_criterion_score
 
+# -- Rankings shared by every session with the same query, city and preferences (filled for the starters at boot) --
+ranking_cache = LRUCache(maxsize=RANKING_CACHE_SIZE, ttl=RANKING_CACHE_TTL)
+# -- Identical rankings requested at the same time (e.g. many users clicking the same starter) are computed once --
+ranking_flight = SingleFlight()
 
-def build_mcdm_workflow(top_k, city_filter, cosine_threshold, query, preferences_dict):
+
+def normalize_city_filter(city_filter) -> str:
+    """
+    The city of the ranking, "Whatever" for anything else: the agent fills an argument the LLM left out
+    with its schema (a dict), which must not reach the cache key.
+    """
+    return city_filter if isinstance(city_filter, str) and city_filter in ["Ha Noi", "Ho Chi Minh"] else "Whatever"
+
+
+def get_ranking_cache_key(top_k, city_filter, cosine_threshold, query, preferences_dict):
+    """Everything the ranking depends on, normalized: the search parameters and the scalar user preferences."""
+    user_preferences = (preferences_dict or {}).get("user_preferences", {})
+    preferences = tuple(sorted((key, value) for key, value in user_preferences.items() if isinstance(value, (bool, int, float))))
+    return top_k, normalize_city_filter(city_filter), round(cosine_threshold, 4), normalize_query(query), preferences
+
+
+def get_search_restaurants_kwargs(top_k, city_filter, cosine_threshold, query):
+    """`search_restaurants` arguments of the workflow candidates."""
+    search_restaurants_kwargs = {"natural_query": query, "limit": top_k * 100, "score_threshold": cosine_threshold}
+    if city_filter in ["Ha Noi", "Ho Chi Minh"]:
+        search_restaurants_kwargs["city"] = city_filter
+    return search_restaurants_kwargs
+
+
+def build_mcdm_workflow(top_k, city_filter, cosine_threshold, query, preferences_dict, search_results=None):
+    """
+    Cached `run_mcdm_workflow`, concurrent calls with the same key share one computation.
+    Only the rankings of the workflow's own search are cached and shared. The speculative `search_results`
+    are scored against the raw message of one session, not against `query`, so a ranking of their candidates
+    is returned to that session only.
+    Returns copies of the top-k ranking and the payloads, callers may modify them.
+    """
+    city_filter = normalize_city_filter(city_filter)
+    cache_key = get_ranking_cache_key(top_k, city_filter, cosine_threshold, query, preferences_dict)
+
+    def rank():
+        # -- a call that just finished may have cached it between our lookup and the flight --
+        ranking = ranking_cache.get(cache_key)
+        if ranking is None:
+            ranking = run_mcdm_workflow(top_k, city_filter, cosine_threshold, query, preferences_dict)
+            ranking_cache.set(cache_key, ranking)
+        return ranking
+
+    search_restaurants_kwargs = get_search_restaurants_kwargs(top_k, city_filter, cosine_threshold, query)
+    cached = ranking_cache.get(cache_key)
+    if cached is not None:
+        log.info(f"Reusing the cached ranking for: {query}")
+    elif narrow_search_results(search_results, search_restaurants_kwargs) is not None:
+        cached = run_mcdm_workflow(top_k, city_filter, cosine_threshold, query, preferences_dict, search_results)
+    else:
+        cached, shared = ranking_flight.do(cache_key, rank)
+        if shared:
+            log.info(f"Shared the in-flight ranking for: {query}")
+
+    location_top_k, candidate_payloads = cached
+    return location_top_k.copy(), [dict(payload) for payload in candidate_payloads]
+
+
+def run_mcdm_workflow(top_k, city_filter, cosine_threshold, query, preferences_dict, search_results=None):
     """
     Builds a multi-criteria decision analysis (MCDA) workflow for ranking restaurants.
     The workflow consists of the following steps:
@@ -14,12 +78,16 @@ def build_mcdm_workflow(top_k, city_filter, cosine_threshold, query, preferences
     2. Compute normalized criterion scores for each restaurant
     3. Check user preferences and compute distance score if user has distance preference
     4. Rank restaurants using ELECTRE III algorithm
+    `search_results` are broader results of an earlier (speculative) search, narrowed down instead of searching again.
+    Returns the top-k ranking and the retrieved payloads (address, url, image, ...) of those restaurants.
     """
-    search_restaurants_kwargs = {"natural_query": query, "limit": top_k * 100, "score_threshold": cosine_threshold}
-    if city_filter in ["Ha Noi", "Ho Chi Minh"]:
-        search_restaurants_kwargs["city"] = city_filter
-    locations_with_query_matching_score = qdrant_client_location.search_restaurants(**search_restaurants_kwargs)
-    log.info("Successfully retrieved candidate restaurants from Qdrant with cosine similarity score")
+    search_restaurants_kwargs = get_search_restaurants_kwargs(top_k, city_filter, cosine_threshold, query)
+    locations_with_query_matching_score = narrow_search_results(search_results, search_restaurants_kwargs)
+    if locations_with_query_matching_score is not None:
+        log.info("Narrowed down the speculative search results to the candidate restaurants")
+    else:
+        locations_with_query_matching_score = qdrant_client_location.search_restaurants(**search_restaurants_kwargs)
+        log.info("Successfully retrieved candidate restaurants from Qdrant with cosine similarity score")
     if locations_with_query_matching_score.empty:
         raise ValueError(f"No candidate restaurants found for query: {query}. Need to refine query.")
     criteria = ["food", "ambience", "price", "service"]
@@ -58,4 +126,24 @@ def build_mcdm_workflow(top_k, city_filter, cosine_threshold, query, preferences
     selected_columns = ["location_id", "location_name"] + score_columns
     location_top_k = location_top_k.sort_values(by="electre_rank").reset_index(drop=True)
     location_top_k = location_top_k[selected_columns].drop(columns=["electre_score"], errors="ignore")
-    return location_top_k
+    payload_columns = [col for col in LOCATION_DETAIL_COLUMNS if col in locations_with_query_matching_score.columns]
+    candidate_payloads = locations_with_query_matching_score.loc[
+        locations_with_query_matching_score["location_id"].isin(location_top_k["location_id"]), payload_columns
+    ].to_dict("records")
+    return location_top_k, candidate_payloads
+
+
+def narrow_search_results(search_results, search_restaurants_kwargs):
+    """
+    Apply the score threshold, city and limit of `search_restaurants_kwargs` to broader search results.
+    Returns None when there is nothing left, so the caller searches with its own query instead.
+    """
+    if search_results is None or search_results.empty:
+        return None
+
+    locations = search_results[search_results["query_matching_score"] >= search_restaurants_kwargs["score_threshold"]]
+    if "city" in search_restaurants_kwargs:
+        locations = locations[locations["city"] == search_restaurants_kwargs["city"]]
+    locations = locations.head(search_restaurants_kwargs["limit"]).reset_index(drop=True)
+
+    return locations if not locations.empty else None
@@ -1,9 +1,15 @@
 import os
-from typing import Dict, List
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
 
 import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
 from loguru import logger as log
 
+from src.helper.cache import LRUCache
+from src.helper.vars import S3_MAX_POOL_CONNECTIONS, S3_OBJECT_CACHE_SIZE
+
 
 class S3Client:
     """A client for interacting with an AWS S3 bucket."""
@@ -31,6 +37,7 @@ class S3Client:
             endpoint_url=os.getenv("DEV_AWS_ENDPOINT"),
             aws_access_key_id=os.getenv("APP_AWS_ACCESS_KEY"),
             aws_secret_access_key=os.getenv("APP_AWS_SECRET_KEY"),
+            config=Config(max_pool_connections=S3_MAX_POOL_CONNECTIONS),
         )
 
         try:
@@ -43,22 +50,64 @@ class S3Client:
             log.error(f"Error creating bucket: {e}")
             raise
 
+        # -- Local copy of the objects read or written: {key: (etag, data)}, revalidated with conditional GETs --
+        self._objects = LRUCache(maxsize=S3_OBJECT_CACHE_SIZE)
+
         log.success(f"S3 client initialized for bucket: {self._bucket_name}")
 
-    def list_objects(self) -> List[Dict[str, str]]:
-        """List all objects in the S3 bucket."""
-        response = self.s3.list_objects_v2(Bucket=self._bucket_name)
-        objects = response.get("Contents", [])
-        return [{"file": obj["Key"], "size": obj["Size"]} for obj in objects]
+    def list_objects(self, prefix: str = "") -> List[Dict[str, str]]:
+        """List all objects in the S3 bucket (or under `prefix`), following the pagination of `list_objects_v2`."""
+        paginator = self.s3.get_paginator("list_objects_v2")
+        return [
+            {"file": obj["Key"], "size": obj["Size"]}
+            for page in paginator.paginate(Bucket=self._bucket_name, Prefix=prefix)
+            for obj in page.get("Contents", [])
+        ]
+
+    def head_object(self, object_key: str) -> Optional[Dict[str, Any]]:
+        """Metadata (etag, size, last_modified) of an object without reading it, or None if it does not exist."""
+        try:
+            response = self.s3.head_object(Bucket=self._bucket_name, Key=object_key)
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return {"etag": response["ETag"], "size": response["ContentLength"], "last_modified": response["LastModified"]}
+
+    def object_exists(self, object_key: str) -> bool:
+        """Check whether an object exists with a HEAD request."""
+        return self.head_object(object_key) is not None
 
     def read_object(self, object_key: str) -> str:
-        """Read an object from the S3 bucket."""
-        response = self.s3.get_object(Bucket=self._bucket_name, Key=object_key)
-        return response["Body"].read().decode("utf-8")
+        """
+        Read an object from the S3 bucket. When a local copy exists, the GET is conditional on its ETag
+        and an unchanged object (304) is served from the copy without transferring it again.
+        """
+        cached = self._objects.get(object_key)
+        params = {"Bucket": self._bucket_name, "Key": object_key}
+        if cached is not None:
+            params["IfNoneMatch"] = cached[0]
+
+        try:
+            response = self.s3.get_object(**params)
+        except ClientError as e:
+            if cached is not None and e.response["Error"]["Code"] in ("304", "NotModified"):
+                return cached[1]
+            if e.response["Error"]["Code"] == "NoSuchKey":
+                self._objects.pop(object_key)
+            raise
+
+        data = response["Body"].read().decode("utf-8")
+        self._objects.set(object_key, (response["ETag"], data))
+        return data
 
     def write_object(self, object_key: str, data: str) -> bool:
-        """Write an object to the S3 bucket."""
+        """Write an object to the S3 bucket, keeping it as the local copy for the next reads."""
         response = self.s3.put_object(Bucket=self._bucket_name, Key=object_key, Body=data.encode("utf-8"))
+        if response.get("ETag"):
+            self._objects.set(object_key, (response["ETag"], data))
+        else:
+            self._objects.pop(object_key)
         return response["ResponseMetadata"]["HTTPStatusCode"] == 200
 
     def upload_file(self, file_path: str) -> bool:
@@ -70,3 +119,16 @@ class S3Client:
         except Exception as e:
             log.error(f"Error uploading file: {e}")
             return False
+
+
+def get_s3_client(bucket_name: Optional[str] = None) -> S3Client:
+    """
+    Process-wide S3 client of a bucket (boto3 clients are thread-safe), so the bucket check and the
+    connection pool are set up once instead of on every chat start.
+    """
+    return _get_s3_client(bucket_name or os.getenv("BUCKET_NAME"))
+
+
+@lru_cache(maxsize=None)
+def _get_s3_client(bucket_name: Optional[str]) -> S3Client:
+    return S3Client(bucket_name=bucket_name)
@@ -0,0 +1,131 @@
+import atexit
+import threading
+from typing import Dict, Optional
+
+import yaml
+from loguru import logger as log
+
+from src.helper.utils import get_config_file
+from src.helper.vars import DEFAULT_USER_PREFERENCES, PREFERENCES_FLUSH_DELAY, PREFERENCES_PREFIX
+from src.s3.client import S3Client, get_s3_client
+
+
+class PreferenceStore:
+    """
+    User preferences, one S3 object per user (`preferences/<username>.yaml`), cached in memory.
+    `set` only updates the cache: the object of the user is written behind, once no change came for `flush_delay`
+    seconds, so moving a slider costs no S3 round trip and sessions of different users never overwrite each other.
+    """
+
+    def __init__(self, bucket_name: Optional[str] = None, prefix: str = PREFERENCES_PREFIX, flush_delay: float = PREFERENCES_FLUSH_DELAY):
+        """
+        Initialize the PreferenceStore.
+
+        Args:
+            bucket_name (Optional[str]): Bucket of the preferences, defaults to the BUCKET_NAME environment variable.
+            prefix (str): Key prefix of the per-user objects.
+            flush_delay (float): Seconds without change before the preferences of a user are written to S3.
+        """
+        self.bucket_name = bucket_name
+        self.prefix = prefix
+        self.flush_delay = flush_delay
+        self._preferences: Dict[str, dict] = {}
+        self._dirty: set = set()
+        self._timers: Dict[str, threading.Timer] = {}
+        self._legacy_preferences: Optional[Dict[str, dict]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def s3_client(self) -> S3Client:
+        return get_s3_client(self.bucket_name)
+
+    def get(self, username: str, refresh: bool = False) -> dict:
+        """
+        Preferences of `username`: from memory, else from its S3 object, else from the legacy shared config file,
+        else the defaults. Returns a copy, use `set` to change them.
+
+        Args:
+            username (str): The user.
+            refresh (bool): Revalidate the cached preferences against S3 (a conditional GET, e.g. on session start,
+                in case another process changed them). Changes not flushed yet are kept as is.
+        """
+        with self._lock:
+            if username in self._preferences and (not refresh or username in self._dirty):
+                return dict(self._preferences[username])
+
+        prefs = self._read(username)
+        with self._lock:
+            # -- a session of the user may have changed them meanwhile, the local change wins until it is flushed --
+            if username not in self._dirty:
+                self._preferences[username] = prefs
+            return dict(self._preferences[username])
+
+    def set(self, username: str, prefs: dict) -> None:
+        """Update the preferences of `username` in memory and schedule their write to S3."""
+        with self._lock:
+            self._preferences[username] = dict(prefs)
+            self._dirty.add(username)
+            if username in self._timers:
+                self._timers[username].cancel()
+
+            timer = threading.Timer(self.flush_delay, self.flush, args=(username,))
+            timer.daemon = True
+            self._timers[username] = timer
+            timer.start()
+
+    def flush(self, username: Optional[str] = None) -> None:
+        """Write the pending preferences of `username` (of every user if None) to S3 now."""
+        with self._lock:
+            usernames = [username] if username is not None else list(self._dirty)
+            pending = {}
+            for name in usernames:
+                timer = self._timers.pop(name, None)
+                if timer is not None:
+                    timer.cancel()
+                if name in self._dirty:
+                    self._dirty.discard(name)
+                    pending[name] = dict(self._preferences[name])
+
+        for name, prefs in pending.items():
+            try:
+                self.s3_client.write_object(self.get_object_key(name), yaml.dump(prefs))
+                log.info(f"Preferences of {name} written to S3.")
+            except Exception as e:
+                log.error(f"Error writing preferences of {name} to S3: {e}")
+                with self._lock:
+                    # -- keep them pending for the next change or flush --
+                    self._dirty.add(name)
+
+    def get_object_key(self, username: str) -> str:
+        return f"{self.prefix}{username}.yaml"
+
+    def _read(self, username: str) -> dict:
+        try:
+            prefs = yaml.safe_load(self.s3_client.read_object(self.get_object_key(username)))
+            if isinstance(prefs, dict):
+                return {**DEFAULT_USER_PREFERENCES, **prefs}
+        except self.s3_client.s3.exceptions.NoSuchKey:
+            pass
+
+        legacy_prefs = self._read_legacy_preferences().get(username)
+        if legacy_prefs:
+            log.info(f"Preferences of {username} migrated from {get_config_file()}.")
+            self.set(username, {**DEFAULT_USER_PREFERENCES, **legacy_prefs})
+            return {**DEFAULT_USER_PREFERENCES, **legacy_prefs}
+        return dict(DEFAULT_USER_PREFERENCES)
+
+    def _read_legacy_preferences(self) -> Dict[str, dict]:
+        """Preferences of every user in the former shared config file, read once to migrate them."""
+        if self._legacy_preferences is None:
+            self._legacy_preferences = {}
+            try:
+                if self.s3_client.object_exists(get_config_file()):
+                    config = yaml.safe_load(self.s3_client.read_object(get_config_file())) or {}
+                    self._legacy_preferences = config.get("preferences") or {}
+            except Exception as e:
+                log.warning(f"Error reading legacy preferences from {get_config_file()}: {e}")
+        return self._legacy_preferences
+
+
+preference_store = PreferenceStore()
+atexit.register(preference_store.flush)
@@ -0,0 +1,46 @@
+import threading
+import time
+
+from src.bigquery.handler import BigQueryHandler
+
+
+class RecordingHandler(BigQueryHandler):
+    """Handler without a BigQuery client: the id queries are recorded and take `query_time` seconds."""
+
+    def __init__(self, query_time: float = 0.0):
+        super().__init__(project_id="project")
+        self.query_time = query_time
+        self.queries = []
+
+    def _query_by_ids(self, table_id, ids, columns, id_column):
+        self.queries.append(ids)
+        time.sleep(self.query_time)
+        return [{id_column: _id} for _id in ids]
+
+
+def test_lone_lookup_does_not_wait_for_the_batch_window():
+    handler = RecordingHandler()
+
+    started_at = time.perf_counter()
+    rows = handler.fetch_by_ids("project.dataset.table", [1, 2], batch_window=1.0)
+
+    assert time.perf_counter() - started_at < 0.5
+    assert rows == [{"location_id": 1}, {"location_id": 2}]
+
+
+def test_lookups_under_load_are_merged():
+    handler = RecordingHandler(query_time=0.2)
+    running = threading.Thread(target=handler.fetch_by_ids, args=("project.dataset.table", [1]), kwargs={"batch_window": 0.1})
+    running.start()
+    time.sleep(0.05)
+
+    # -- a query is running: the next leader waits the window and the other lookups join its batch --
+    threads = [
+        threading.Thread(target=handler.fetch_by_ids, args=("project.dataset.table", [_id]), kwargs={"batch_window": 0.1}) for _id in [2, 3, 4]
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in [running, *threads]:
+        thread.join()
+
+    assert handler.queries == [[1], [2, 3, 4]]
@@ -0,0 +1,66 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.chat.cache import CandidatePayloadCache
+from src.helper.cache import SingleFlight
+
+
+def test_candidate_payload_cache_concurrent_puts_of_a_session():
+    cache = CandidatePayloadCache()
+    location_ids = list(range(64))
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        list(executor.map(lambda _id: cache.put("session", [{"location_id": _id, "location_name": f"r{_id}"}], query="pho"), location_ids))
+
+    assert sorted(cache.get_many("session", location_ids)) == location_ids
+    assert set(cache.get_queries("session", location_ids).values()) == {"pho"}
+
+
+def test_single_flight_runs_once_for_concurrent_callers():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "ranking"
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        leader = executor.submit(flight.do, "key", compute)
+        started.wait(5)
+        followers = [executor.submit(flight.do, "key", compute) for _ in range(7)]
+        time.sleep(0.05)
+        release.set()
+        results = [leader.result(), *(follower.result() for follower in followers)]
+
+    assert len(calls) == 1
+    assert results == [("ranking", False)] + [("ranking", True)] * 7
+    assert flight._calls == {}
+
+
+def test_single_flight_exception_reaches_every_waiter():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def compute():
+        started.set()
+        release.wait(5)
+        raise ValueError("No candidate restaurants found")
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        leader = executor.submit(flight.do, "key", compute)
+        started.wait(5)
+        followers = [executor.submit(flight.do, "key", compute) for _ in range(3)]
+        time.sleep(0.05)
+        release.set()
+        for future in [leader, *followers]:
+            with pytest.raises(ValueError, match="No candidate"):
+                future.result()
+
+    assert flight._calls == {}
+    assert flight.do("key", lambda: "again") == ("again", False)
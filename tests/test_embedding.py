@@ -0,0 +1,94 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from src.qdrant.embedding import EmbeddingService
+
+
+class FakeModel:
+    """Embeds a text as [number of characters, sum of its character codes], recording the size of each call."""
+
+    def __init__(self, error: Exception = None):
+        self.error = error
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def embed(self, texts, **kwargs):
+        with self._lock:
+            self.calls.append((list(texts), kwargs))
+        if self.error is not None:
+            raise self.error
+        return (expected_vector(text) for text in texts)
+
+
+def expected_vector(text: str) -> np.ndarray:
+    return np.array([len(text), sum(map(ord, text))], dtype=np.float32)
+
+
+def make_service(model: FakeModel, **kwargs) -> EmbeddingService:
+    service = EmbeddingService(**kwargs)
+    service._model = model
+    return service
+
+
+def test_micro_batch_is_split_back_per_request():
+    model = FakeModel()
+    service = make_service(model)
+    requests = [(["pho", "bun cha"], Future()), (["sushi"], Future()), (["banh mi", "com tam", "lau"], Future())]
+
+    service._embed_requests(requests)
+
+    assert [texts for texts, _ in model.calls] == [["pho", "bun cha", "sushi", "banh mi", "com tam", "lau"]]
+    for texts, future in requests:
+        np.testing.assert_array_equal(np.stack(future.result()), np.stack([expected_vector(text) for text in texts]))
+
+
+def test_model_error_reaches_every_waiting_request():
+    service = make_service(FakeModel(error=RuntimeError("model crashed")))
+    requests = [(["pho"], Future()), (["sushi"], Future())]
+
+    service._embed_requests(requests)
+
+    for _, future in requests:
+        with pytest.raises(RuntimeError, match="model crashed"):
+            future.result()
+
+
+def test_concurrent_callers_get_their_own_vectors_in_order():
+    model = FakeModel()
+    service = make_service(model, max_wait=0.05)
+    queries = [[f"query {i}", f"dish {i}", f"city {i}"][: 1 + i % 3] for i in range(16)]
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = list(executor.map(service.embed, queries))
+
+    for texts, vectors in zip(queries, results):
+        np.testing.assert_array_equal(np.stack(vectors), np.stack([expected_vector(text) for text in texts]))
+    assert len(model.calls) < len(queries)
+    assert sum(len(texts) for texts, _ in model.calls) == sum(len(texts) for texts in queries)
+
+
+def test_repeated_queries_are_not_embedded_again():
+    model = FakeModel()
+    service = make_service(model)
+
+    first = service.embed("pho in Ha Noi")
+    first[0] /= 2
+    second = service.embed(["pho in Ha Noi"])
+
+    assert len(model.calls) == 1
+    np.testing.assert_array_equal(second[0], expected_vector("pho in Ha Noi"))
+
+
+def test_bulk_and_model_kwargs_bypass_the_micro_batching():
+    model = FakeModel()
+    service = make_service(model, max_batch_size=4)
+
+    service.embed([f"restaurant {i}" for i in range(4)])
+    service.embed(["pho"], parallel=2)
+
+    assert [len(texts) for texts, _ in model.calls] == [4, 1]
+    assert model.calls[1][1] == {"parallel": 2}
+    assert service._worker is None
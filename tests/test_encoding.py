@@ -0,0 +1,38 @@
+import pytest
+
+from src.chat.encoding import CandidateRanking, encode_candidates
+
+RECORDS = [
+    {"location_id": 101, "location_name": "Pho Thin", "query_matching_score": 0.81234, "food_score": 71.4567, "price_score": 12.0},
+    {"location_id": 102, "location_name": "Bun Cha, Huong Lien", "query_matching_score": 0.79, "food_score": 65.0, "price_score": 30.556},
+]
+
+
+def test_compact_encoding_shortens_the_keys_and_rounds_the_scores():
+    assert encode_candidates(RECORDS, encoding="compact", decimals=2) == (
+        'id,name,match,food,price\n101,Pho Thin,0.81,71.46,12.0\n102,"Bun Cha, Huong Lien",0.79,65.0,30.56'
+    )
+
+
+def test_csv_encoding_keeps_the_keys():
+    assert encode_candidates(RECORDS, encoding="csv", decimals=1).splitlines()[:2] == [
+        "location_id,location_name,query_matching_score,food_score,price_score",
+        "101,Pho Thin,0.8,71.5,12.0",
+    ]
+
+
+def test_github_encoding_keeps_full_precision():
+    assert "71.4567" in encode_candidates(RECORDS, encoding="github")
+
+
+def test_unknown_encoding():
+    with pytest.raises(ValueError, match="Invalid candidate encoding"):
+        encode_candidates(RECORDS, encoding="json")
+
+
+def test_candidate_ranking_encodes_for_the_llm_and_the_ui():
+    ranking = CandidateRanking(records=RECORDS, encoding="compact")
+
+    assert str(ranking).startswith("id,name,match,food,price\n")
+    assert "location_name" in ranking.to_display()
+    assert str(CandidateRanking()) == ""
@@ -0,0 +1,48 @@
+import pandas as pd
+
+from src.feature_store.bigquery import BigQueryFeatureStore
+from src.helper.cache import LRUCache
+from src.helper.vars import LOCATION_DETAIL_COLUMNS
+
+
+class FakeBigQueryHandler:
+    """Table without the optional `short_description` column, as before the describe job has run."""
+
+    def __init__(self):
+        self.columns = [column for column in LOCATION_DETAIL_COLUMNS if column != "short_description"]
+        self.queried_columns = []
+
+    def get_table_columns(self, table_id):
+        return list(self.columns)
+
+    def fetch_by_ids(self, table_id, ids, columns, id_column, batch_window):
+        unknown_columns = set(columns) - set(self.columns)
+        if unknown_columns:
+            raise ValueError(f"Unrecognized names: {unknown_columns}")
+        self.queried_columns.append(columns)
+        return [{column: _id if column == id_column else f"{column}-{_id}" for column in columns} for _id in ids]
+
+    def update_by_ids(self, table_id, dataframe, id_column):
+        self.columns += [column for column in dataframe.columns if column not in self.columns]
+
+
+def test_fetch_by_ids_without_optional_columns():
+    handler = FakeBigQueryHandler()
+    store = BigQueryFeatureStore(handler, table_id="project.dataset.table", cache=LRUCache())
+
+    records = store.fetch_by_ids([1, 2])
+
+    assert [record["location_id"] for record in records] == [1, 2]
+    assert all(record["short_description"] is None for record in records)
+    assert "short_description" not in handler.queried_columns[0]
+
+
+def test_fetch_by_ids_after_adding_optional_columns():
+    handler = FakeBigQueryHandler()
+    store = BigQueryFeatureStore(handler, table_id="project.dataset.table", cache=LRUCache())
+    store.fetch_by_ids([1])
+
+    store.write_columns(pd.DataFrame({"location_id": [1], "short_description": ["Cozy pho place"]}))
+    store.fetch_by_ids([1])
+
+    assert "short_description" in handler.queried_columns[-1]
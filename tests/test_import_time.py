@@ -0,0 +1,48 @@
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, Tuple
+
+import pytest
+
+from src.helper.vars import IMPORT_TIME_BUDGET, LAZY_IMPORT_MODULES, PROJECT_ROOT
+
+APP_MODULE = "src.chainlit"
+# -- `python -X importtime` line: "import time: self [us] | cumulative | <indent>module" --
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+def measure_import(module: str) -> Dict[str, Tuple[int, int]]:
+    """Import `module` in a fresh interpreter, returns {module: (cumulative us, depth)} of every module it loaded."""
+    # -- No credentials: importing must not need them (clients are built on first use) --
+    env = {key: value for key, value in os.environ.items() if key != "OPENAI_API_KEY"}
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True, env=env, cwd=PROJECT_ROOT)
+    assert result.returncode == 0, f"Importing {module} failed:\n{result.stderr[-2000:]}"
+
+    imports = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            imports[match.group(4)] = (int(match.group(2)), len(match.group(3)) // 2)
+    return imports
+
+
+@pytest.fixture(scope="module")
+def app_imports() -> Dict[str, Tuple[int, int]]:
+    """Fastest of three imports of the app, the first one also compiles the bytecode."""
+    return min((measure_import(APP_MODULE) for _ in range(3)), key=lambda imports: imports[APP_MODULE][0])
+
+
+def test_heavy_modules_are_not_imported_at_startup(app_imports):
+    eager_modules = [name for name in LAZY_IMPORT_MODULES if name in app_imports]
+    assert not eager_modules, f"Modules meant to load on first use are imported at startup: {eager_modules}"
+
+
+def test_app_import_time_is_under_budget(app_imports):
+    total = app_imports[APP_MODULE][0] / 1e6
+    slowest = sorted(
+        ((name, cumulative / 1e3) for name, (cumulative, depth) in app_imports.items() if name.startswith("src.") and depth <= 1),
+        key=lambda item: -item[1],
+    )[:10]
+    assert total <= IMPORT_TIME_BUDGET, f"import {APP_MODULE}: {total:.2f} s (budget {IMPORT_TIME_BUDGET:.2f} s), slowest: {slowest}"
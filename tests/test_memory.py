@@ -0,0 +1,85 @@
+from llama_index.core.base.llms.types import ChatMessage, MessageRole
+from llama_index.core.storage.chat_store import SimpleChatStore
+
+from src.chat.encoding import encode_candidates
+from src.chat.memory import SummarizingChatMemory, summarize_tool_output
+from src.chat.tools import render_location_card
+from src.helper.vars import ENRICH_TOOL_NAME, RANKING_TOOL_NAME
+
+CANDIDATES = [
+    {"location_id": 100 + i, "location_name": f"Pho {i}", "query_matching_score": 0.8123, "food_score": 71.456, "price_score": 12.5} for i in range(8)
+]
+
+
+def test_summarize_compact_ranking():
+    content = encode_candidates(CANDIDATES, encoding="compact")
+
+    summary = summarize_tool_output(RANKING_TOOL_NAME, content, max_chars=50)
+
+    assert summary == f"[Ranked 8 candidates (id name), best first: {'; '.join(f'{100 + i} Pho {i}' for i in range(8))}]"
+
+
+def test_summarize_csv_ranking():
+    content = encode_candidates(CANDIDATES, encoding="csv")
+
+    summary = summarize_tool_output(RANKING_TOOL_NAME, content, max_chars=50)
+
+    assert summary.startswith("[Ranked 8 candidates (id name), best first: 100 Pho 0; 101 Pho 1;")
+
+
+def test_summarize_enrichment_headings():
+    content = "\n\n".join(render_location_card({"location_name": f"Pho {i}", "address": "1 Hang Bac"}, "Rich broth.") for i in range(3))
+
+    summary = summarize_tool_output(ENRICH_TOOL_NAME, content, max_chars=50)
+
+    assert summary == "[Recommended to the user: Pho 0; Pho 1; Pho 2]"
+
+
+def test_summarize_truncates_other_outputs():
+    assert summarize_tool_output("other_tool", "short output", max_chars=50) == "short output"
+    assert summarize_tool_output(ENRICH_TOOL_NAME, "x" * 60, max_chars=10) == "xxxxxxxxxx ...[truncated]"
+    assert summarize_tool_output(RANKING_TOOL_NAME, "no header " * 10, max_chars=10) == "no header ...[truncated]"
+
+
+def make_memory(token_limit: int) -> SummarizingChatMemory:
+    # -- one token per word --
+    return SummarizingChatMemory.from_defaults(token_limit=token_limit, chat_store=SimpleChatStore(), tokenizer_fn=str.split)
+
+
+def put_turn(memory: SummarizingChatMemory, index: int, tool_words: int) -> None:
+    memory.put(ChatMessage(role=MessageRole.USER, content=f"question {index}"))
+    memory.put(ChatMessage(role=MessageRole.ASSISTANT, content="", additional_kwargs={"tool_calls": []}))
+    memory.put(
+        ChatMessage(
+            role=MessageRole.TOOL,
+            content=encode_candidates(CANDIDATES, encoding="compact") + " pad" * tool_words,
+            additional_kwargs={"name": RANKING_TOOL_NAME, "tool_call_id": f"call_{index}"},
+        )
+    )
+    memory.put(ChatMessage(role=MessageRole.ASSISTANT, content=f"answer {index}"))
+
+
+def test_memory_drops_oldest_turns_over_budget():
+    memory = make_memory(token_limit=100)
+    for index in range(3):
+        put_turn(memory, index, tool_words=20)
+
+    messages = memory.get()
+
+    # -- older tool outputs are summarized, then the oldest turns dropped until the rest fits --
+    assert [m.content for m in messages if m.role == MessageRole.USER] == ["question 1", "question 2"]
+    assert messages[2].content.startswith("[Ranked 8 candidates")
+    assert messages[-2].content.endswith("pad")
+
+
+def test_memory_keeps_the_latest_turn_over_budget():
+    memory = make_memory(token_limit=20)
+    for index in range(3):
+        put_turn(memory, index, tool_words=200)
+
+    messages = memory.get()
+
+    assert [m.content for m in messages if m.role == MessageRole.USER] == ["question 2"]
+    assert messages[2].content.startswith("[Ranked 8 candidates")
+    assert messages[2].additional_kwargs["tool_call_id"] == "call_2"
+    assert messages[-1].content == "answer 2"
@@ -0,0 +1,95 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+import yaml
+
+from src.helper.vars import CONFIG_FILE, DEFAULT_USER_PREFERENCES
+from src.s3.preferences import PreferenceStore
+
+
+class NoSuchKey(Exception):
+    pass
+
+
+class FakeS3Client:
+    """In-memory bucket with the `S3Client` methods used by the store. Writes fail while `fail_writes` is set."""
+
+    def __init__(self, objects=None):
+        self.objects = dict(objects or {})
+        self.writes = []
+        self.fail_writes = False
+        self.s3 = SimpleNamespace(exceptions=SimpleNamespace(NoSuchKey=NoSuchKey))
+
+    def read_object(self, object_key):
+        if object_key not in self.objects:
+            raise NoSuchKey(object_key)
+        return self.objects[object_key]
+
+    def write_object(self, object_key, data):
+        if self.fail_writes:
+            raise ConnectionError("S3 unavailable")
+        self.writes.append((object_key, yaml.safe_load(data)))
+        self.objects[object_key] = data
+        return True
+
+    def object_exists(self, object_key):
+        return object_key in self.objects
+
+
+@pytest.fixture
+def s3_client(monkeypatch):
+    client = FakeS3Client()
+    monkeypatch.setattr(PreferenceStore, "s3_client", property(lambda self: client))
+    return client
+
+
+def test_set_is_written_once_after_the_changes(s3_client):
+    store = PreferenceStore(flush_delay=0.1)
+    for food_score in [0.3, 0.4, 0.5]:
+        store.set("alice", {**DEFAULT_USER_PREFERENCES, "food_score": food_score})
+
+    assert s3_client.writes == []
+    time.sleep(0.3)
+
+    assert s3_client.writes == [("preferences/alice.yaml", {**DEFAULT_USER_PREFERENCES, "food_score": 0.5})]
+
+
+def test_failed_write_stays_pending(s3_client):
+    store = PreferenceStore(flush_delay=60)
+    store.set("alice", {**DEFAULT_USER_PREFERENCES, "food_score": 0.9})
+
+    s3_client.fail_writes = True
+    store.flush("alice")
+    assert s3_client.writes == []
+
+    s3_client.fail_writes = False
+    store.flush()
+    assert s3_client.writes == [("preferences/alice.yaml", {**DEFAULT_USER_PREFERENCES, "food_score": 0.9})]
+
+
+def test_legacy_preferences_are_migrated(s3_client):
+    s3_client.objects[CONFIG_FILE] = yaml.dump({"preferences": {"alice": {"food_score": 0.8}}})
+    store = PreferenceStore(flush_delay=60)
+
+    assert store.get("alice") == {**DEFAULT_USER_PREFERENCES, "food_score": 0.8}
+    assert store.get("bob") == DEFAULT_USER_PREFERENCES
+
+    store.flush()
+    assert s3_client.writes == [("preferences/alice.yaml", {**DEFAULT_USER_PREFERENCES, "food_score": 0.8})]
+
+
+def test_refresh_keeps_unflushed_changes(s3_client):
+    s3_client.objects["preferences/alice.yaml"] = yaml.dump({**DEFAULT_USER_PREFERENCES, "food_score": 0.2})
+    store = PreferenceStore(flush_delay=60)
+    assert store.get("alice")["food_score"] == 0.2
+
+    store.set("alice", {**DEFAULT_USER_PREFERENCES, "food_score": 0.7})
+    # -- changed by another process meanwhile --
+    s3_client.objects["preferences/alice.yaml"] = yaml.dump({**DEFAULT_USER_PREFERENCES, "food_score": 0.1})
+    assert store.get("alice", refresh=True)["food_score"] == 0.7
+
+    store.flush()
+    s3_client.objects["preferences/alice.yaml"] = yaml.dump({**DEFAULT_USER_PREFERENCES, "food_score": 0.1})
+    assert store.get("alice")["food_score"] == 0.7
+    assert store.get("alice", refresh=True)["food_score"] == 0.1
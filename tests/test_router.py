@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from src.chat.router import DISH_WORDS, IntentRouter
+
+
+@pytest.fixture
+def router(monkeypatch):
+    monkeypatch.setattr("src.chat.router.get_food_words", lambda: DISH_WORDS)
+    # -- every message embeds like the known intents: only the rules decide --
+    return IntentRouter(embed=lambda texts: [np.ones(8, dtype=np.float32) for _ in texts], known_intents=["pho in Ha Noi"])
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        "I don't want BBQ in Hanoi",
+        "I don’t want BBQ in Hanoi",
+        "I dont want BBQ in Hanoi",
+        "avoid seafood in hanoi",
+        "I'm avoiding seafood in Ha Noi",
+        "pho that isn't spicy in Ho Chi Minh",
+        "never sushi in Saigon",
+        "I hate seafood, Ha Noi",
+        "I dislike pizza in Hanoi",
+        "BBQ without pork in Hanoi",
+        "I want to eat BBQ that is affordable",
+    ],
+)
+def test_route_leaves_negations_and_missing_city_to_the_agent(router, message):
+    assert router.route(message) is None
+
+
+@pytest.mark.parametrize(
+    "message, arguments",
+    [
+        ("I want to eat Pho at Ho Chi Minh City", {"english_natural_query": "pho", "city_filter": "Ho Chi Minh"}),
+        ("affordable seafood restaurant in Ha Noi", {"english_natural_query": "affordable seafood", "city_filter": "Ha Noi"}),
+    ],
+)
+def test_route_simple_requests(router, message, arguments):
+    assert router.route(message) == arguments
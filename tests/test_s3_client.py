@@ -0,0 +1,75 @@
+import io
+
+import boto3
+import pytest
+from botocore.exceptions import ClientError
+from botocore.response import StreamingBody
+from botocore.stub import Stubber
+
+from src.s3.client import S3Client
+
+BUCKET = "foodbot"
+KEY = "preferences/alice.yaml"
+
+
+def body(data: bytes) -> StreamingBody:
+    return StreamingBody(io.BytesIO(data), len(data))
+
+
+@pytest.fixture
+def stubbed_client(monkeypatch):
+    s3 = boto3.client("s3", region_name="us-east-1", aws_access_key_id="test", aws_secret_access_key="test")
+    stubber = Stubber(s3)
+    stubber.add_response("create_bucket", {}, {"Bucket": BUCKET})
+    monkeypatch.setattr("src.s3.client.boto3.client", lambda **kwargs: s3)
+    with stubber:
+        yield S3Client(bucket_name=BUCKET), stubber
+        stubber.assert_no_pending_responses()
+
+
+def test_read_object_serves_the_local_copy_on_304(stubbed_client):
+    client, stubber = stubbed_client
+    stubber.add_response("get_object", {"Body": body(b"food_score: 0.5\n"), "ETag": '"v1"'}, {"Bucket": BUCKET, "Key": KEY})
+    stubber.add_client_error(
+        "get_object", service_error_code="NotModified", http_status_code=304, expected_params={"Bucket": BUCKET, "Key": KEY, "IfNoneMatch": '"v1"'}
+    )
+
+    assert client.read_object(KEY) == "food_score: 0.5\n"
+    assert client.read_object(KEY) == "food_score: 0.5\n"
+
+
+def test_read_object_refreshes_a_changed_object(stubbed_client):
+    client, stubber = stubbed_client
+    stubber.add_response("get_object", {"Body": body(b"v1"), "ETag": '"v1"'}, {"Bucket": BUCKET, "Key": KEY})
+    stubber.add_response("get_object", {"Body": body(b"v2"), "ETag": '"v2"'}, {"Bucket": BUCKET, "Key": KEY, "IfNoneMatch": '"v1"'})
+    stubber.add_client_error(
+        "get_object", service_error_code="NotModified", http_status_code=304, expected_params={"Bucket": BUCKET, "Key": KEY, "IfNoneMatch": '"v2"'}
+    )
+
+    assert [client.read_object(KEY) for _ in range(3)] == ["v1", "v2", "v2"]
+
+
+def test_read_object_drops_the_local_copy_of_a_deleted_object(stubbed_client):
+    client, stubber = stubbed_client
+    stubber.add_response("get_object", {"Body": body(b"v1"), "ETag": '"v1"'}, {"Bucket": BUCKET, "Key": KEY})
+    stubber.add_client_error(
+        "get_object", service_error_code="NoSuchKey", http_status_code=404, expected_params={"Bucket": BUCKET, "Key": KEY, "IfNoneMatch": '"v1"'}
+    )
+    # -- no local copy left: the next read is unconditional --
+    stubber.add_client_error("get_object", service_error_code="NoSuchKey", http_status_code=404, expected_params={"Bucket": BUCKET, "Key": KEY})
+
+    client.read_object(KEY)
+    for _ in range(2):
+        with pytest.raises(ClientError, match="NoSuchKey"):
+            client.read_object(KEY)
+
+
+def test_write_object_keeps_the_local_copy(stubbed_client):
+    client, stubber = stubbed_client
+    stubber.add_response("put_object", {"ETag": '"v3"', "ResponseMetadata": {"HTTPStatusCode": 200}}, {"Bucket": BUCKET, "Key": KEY, "Body": b"v3"})
+    stubber.add_client_error(
+        "get_object", service_error_code="NotModified", http_status_code=304, expected_params={"Bucket": BUCKET, "Key": KEY, "IfNoneMatch": '"v3"'}
+    )
+
+    assert client.write_object(KEY, "v3")
+    assert client.read_object(KEY) == "v3"
@@ -0,0 +1,83 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from src.helper.cache import LRUCache
+from src.helper.vars import COSINE_THRESHOLD, DEFAULT_USER_PREFERENCES, TOP_K
+from src.ranker import workflow
+from src.ranker.workflow import get_ranking_cache_key
+
+
+def test_ranking_cache_key_without_city_filter():
+    # -- an argument the LLM left out is filled with its schema by the agent --
+    city_schema = {"enum": ["Ha Noi", "Ho Chi Minh", "Whatever"], "type": "string", "default": "Whatever"}
+    key = get_ranking_cache_key(TOP_K, city_schema, COSINE_THRESHOLD, "pho", {"user_preferences": dict(DEFAULT_USER_PREFERENCES)})
+
+    assert hash(key) == hash(get_ranking_cache_key(TOP_K, "Whatever", COSINE_THRESHOLD, "pho", {"user_preferences": dict(DEFAULT_USER_PREFERENCES)}))
+
+
+def test_ranking_cache_key_normalizes_query_and_city():
+    preferences = {"user_preferences": dict(DEFAULT_USER_PREFERENCES)}
+    key = get_ranking_cache_key(TOP_K, "Ho Chi Minh", COSINE_THRESHOLD, "Korean BBQ", preferences)
+
+    assert key == get_ranking_cache_key(TOP_K, "Ho Chi Minh", COSINE_THRESHOLD, "bbq korean", preferences)
+    assert key != get_ranking_cache_key(TOP_K, "Ha Noi", COSINE_THRESHOLD, "Korean BBQ", preferences)
+    assert get_ranking_cache_key(TOP_K, None, COSINE_THRESHOLD, "pho", None)[1] == "Whatever"
+
+
+@pytest.fixture
+def fake_workflow(monkeypatch):
+    """Empty ranking cache and a `run_mcdm_workflow` recording the search results it ranked."""
+    calls = []
+
+    def run_mcdm_workflow(top_k, city_filter, cosine_threshold, query, preferences_dict, search_results=None):
+        calls.append(search_results)
+        return pd.DataFrame({"location_id": [1], "location_name": ["Pho 10"]}), [{"location_id": 1}]
+
+    monkeypatch.setattr(workflow, "ranking_cache", LRUCache())
+    monkeypatch.setattr(workflow, "run_mcdm_workflow", run_mcdm_workflow)
+    return calls
+
+
+def test_speculative_rankings_are_not_cached(fake_workflow):
+    preferences = {"user_preferences": dict(DEFAULT_USER_PREFERENCES)}
+    speculative = pd.DataFrame({"location_id": [1], "city": ["Ha Noi"], "query_matching_score": [0.9]})
+
+    workflow.build_mcdm_workflow(TOP_K, "Ha Noi", COSINE_THRESHOLD, "pho", preferences, speculative)
+    assert len(workflow.ranking_cache) == 0
+
+    workflow.build_mcdm_workflow(TOP_K, "Ha Noi", COSINE_THRESHOLD, "pho", preferences)
+    location_top_k, _ = workflow.build_mcdm_workflow(TOP_K, "Ha Noi", COSINE_THRESHOLD, "pho", preferences, speculative)
+
+    # -- once the workflow's own ranking is cached, it is served to every session --
+    assert fake_workflow[0] is speculative
+    assert fake_workflow[1:] == [None]
+    assert location_top_k["location_id"].tolist() == [1]
+
+
+def test_speculative_results_left_empty_by_narrowing_are_searched_again(fake_workflow):
+    preferences = {"user_preferences": dict(DEFAULT_USER_PREFERENCES)}
+    below_threshold = pd.DataFrame({"location_id": [1], "city": ["Ha Noi"], "query_matching_score": [COSINE_THRESHOLD - 0.2]})
+
+    workflow.build_mcdm_workflow(TOP_K, "Ha Noi", COSINE_THRESHOLD, "pho", preferences, below_threshold)
+
+    assert fake_workflow == [None]
+    assert len(workflow.ranking_cache) == 1
+
+
+def test_concurrent_identical_rankings_run_once(fake_workflow, monkeypatch):
+    run_mcdm_workflow = workflow.run_mcdm_workflow
+
+    def slow_run_mcdm_workflow(*args, **kwargs):
+        time.sleep(0.1)
+        return run_mcdm_workflow(*args, **kwargs)
+
+    monkeypatch.setattr(workflow, "run_mcdm_workflow", slow_run_mcdm_workflow)
+    preferences = {"user_preferences": dict(DEFAULT_USER_PREFERENCES)}
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        rankings = list(executor.map(lambda _: workflow.build_mcdm_workflow(TOP_K, "Ha Noi", COSINE_THRESHOLD, "pho", preferences), range(8)))
+
+    assert fake_workflow == [None]
+    assert all(location_top_k["location_id"].tolist() == [1] for location_top_k, _ in rankings)